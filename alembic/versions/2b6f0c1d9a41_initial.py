@@ -0,0 +1,74 @@
+"""initial
+
+Revision ID: 2b6f0c1d9a41
+Revises:
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2b6f0c1d9a41'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Базы, созданные до появления цепочки миграций (app.sh генерировал ревизию при запуске), уже содержат таблицы:
+    # создаются только недостающие.
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'menus' not in existing_tables:
+        create_menus_table()
+
+    if 'submenus' not in existing_tables:
+        create_submenus_table()
+
+    if 'dishes' not in existing_tables:
+        create_dishes_table()
+
+
+def create_menus_table() -> None:
+    op.create_table(
+        'menus',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def create_submenus_table() -> None:
+    op.create_table(
+        'submenus',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('menu_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['menu_id'], ['menus.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def create_dishes_table() -> None:
+    op.create_table(
+        'dishes',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('price', sa.DECIMAL(precision=15, scale=2), nullable=False),
+        sa.Column('submenu_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['submenu_id'], ['submenus.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dishes')
+    op.drop_table('submenus')
+    op.drop_table('menus')
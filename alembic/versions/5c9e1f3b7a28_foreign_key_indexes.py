@@ -0,0 +1,52 @@
+"""foreign key indexes
+
+Revision ID: 5c9e1f3b7a28
+Revises: 8e3a5d7c4f12
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5c9e1f3b7a28'
+down_revision: Union[str, None] = '8e3a5d7c4f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY не блокирует запись в таблицу, но не выполняется внутри транзакции, поэтому индексы
+# создаются в autocommit_block. Индекс, оставшийся невалидным после прерванной миграции, нужно удалить вручную.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_submenus_menu_id_id',
+            'submenus',
+            ['menu_id', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_dishes_submenu_id_id',
+            'dishes',
+            ['submenu_id', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_dishes_submenu_id_id',
+            table_name='dishes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_submenus_menu_id_id',
+            table_name='submenus',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
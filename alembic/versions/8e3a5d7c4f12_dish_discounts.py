@@ -0,0 +1,32 @@
+"""dish discounts
+
+Revision ID: 8e3a5d7c4f12
+Revises: 2b6f0c1d9a41
+Create Date: 2026-10-16 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3a5d7c4f12'
+down_revision: Union[str, None] = '2b6f0c1d9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dish_discounts',
+        sa.Column('dish_id', sa.UUID(), nullable=False),
+        sa.Column('discount', sa.DECIMAL(precision=5, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['dish_id'], ['dishes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('dish_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dish_discounts')
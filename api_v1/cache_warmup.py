@@ -0,0 +1,122 @@
+"""
+Модуль прогрева кэша. Значения всех списков и меню собираются из одной выборки дерева меню, а не через обработчики
+эндпоинтов, поэтому прогрев выполняет фиксированное количество запросов к БД.
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Ключи меню - поля хэша поддерева меню
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from config import CACHE_WARMUP_CONCURRENCY
+from database.database import async_session_maker
+from database.database_services import select_all_menus_detail
+from menu.models import Menu
+from services import get_versioned_cache_key, get_write_through_generation, warm_cache
+from submenu.submenu_services import format_submenu
+from submenu.submenu_utils import format_dishes
+
+
+async def build_menu_pairs(
+        menu: Menu,
+        semaphore: asyncio.Semaphore,
+) -> tuple[dict[str, Any], list[dict[Any, Any]]]:
+    """
+    Собирает значения ключей меню, списка его подменю, каждого подменю и списка блюд каждого подменю.
+
+    :param menu: меню с загруженными подменю и блюдами
+    :param semaphore: ограничивает количество меню, обрабатываемых одновременно
+    :return: словарь ключ с версиями: значение и подменю в формате ответа (для menus_detail)
+    """
+
+    menu_id = str(menu.id)
+
+    async with semaphore:
+        pairs: dict[str, Any] = {}
+        submenus = []
+
+        for submenu in menu.submenus:
+            submenu_id = str(submenu.id)
+            formatted_submenu = await format_submenu(submenu=submenu, dishes=submenu.dishes)
+            submenus.append(formatted_submenu)
+
+            submenu_key = await get_versioned_cache_key('submenu', submenu_id, menu_id=menu_id, submenu_id=submenu_id)
+            dishes_key = await get_versioned_cache_key('dishes', submenu_id, menu_id=menu_id, submenu_id=submenu_id)
+
+            pairs[submenu_key] = formatted_submenu
+            pairs[dishes_key] = await format_dishes(submenu.dishes)
+
+        menu_key = await get_versioned_cache_key('menu', menu_id=menu_id)
+        submenus_key = await get_versioned_cache_key('submenus', menu_id=menu_id)
+
+        pairs[menu_key] = {
+            **await menu.json(),
+            'submenus_count': len(menu.submenus),
+            'dishes_count': sum(len(submenu.dishes) for submenu in menu.submenus),
+        }
+        pairs[submenus_key] = submenus
+
+        return pairs, submenus
+
+
+async def warm_up_cache() -> None:
+    """
+    Прогревает кэш: menus, menus_detail, каждое меню, список подменю каждого меню, каждое подменю и список его блюд.
+
+    Ключи с версиями формируются после выборки, поэтому глобальная версия читается до и после нее. Ее изменение
+    означает, что за время прогрева данные изменились и собранные значения могут оказаться под новой версией, - тогда
+    прогрев пропускается, а ключи соберут запросы. Так же прогрев пропускается, если после выборки значения кэша
+    обновлялись на месте (PATCH).
+
+    :return: None
+    """
+
+    started_at = time.perf_counter()
+
+    menus_key = await get_versioned_cache_key('menus')
+    menus_detail_key = await get_versioned_cache_key('menus_detail')
+    write_through_generation = await get_write_through_generation()
+
+    async with async_session_maker() as session:
+        menus = await select_all_menus_detail(session=session)
+
+    semaphore = asyncio.Semaphore(CACHE_WARMUP_CONCURRENCY)
+    menus_results = await asyncio.gather(*(build_menu_pairs(menu=menu, semaphore=semaphore) for menu in menus))
+
+    if await get_versioned_cache_key('menus') != menus_key:
+        logging.info('Прогрев кэша пропущен: данные изменились во время прогрева')
+        return
+
+    pairs: dict[str, Any] = {menus_key: [await menu.json() for menu in menus]}
+    menus_detail = []
+
+    for menu, (menu_pairs, submenus) in zip(menus, menus_results):
+        pairs.update(menu_pairs)
+        menus_detail.append({**await menu.json_detail(), 'submenus': submenus})
+
+    pairs[menus_detail_key] = menus_detail
+
+    if not await warm_cache(pairs=pairs, write_through_generation=write_through_generation):
+        logging.info('Прогрев кэша пропущен: значения кэша обновлялись во время прогрева')
+        return
+
+    logging.info('Кэш прогрет: %s ключей за %.3f с', len(pairs), time.perf_counter() - started_at)
+
+
+async def run_cache_warmup() -> None:
+    """
+    Прогревает кэш, записывая ошибку в лог вместо исключения: без прогрева приложение работает, просто медленнее
+    отвечает на первые запросы.
+
+    :return: None
+    """
+
+    try:
+        await warm_up_cache()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logging.exception('Не удалось прогреть кэш')
@@ -0,0 +1,81 @@
+"""
+Модуль для обработки условных GET запросов (If-None-Match).
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | If-None-Match передается в замыкание как str
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def is_etag_matched(etag: str, if_none_match: str) -> bool:
+    """
+    Сравнивает ETag ответа со значением заголовка If-None-Match. Для If-None-Match используется слабое сравнение:
+    префикс W/ не учитывается.
+
+    :param etag: ETag ответа
+    :param if_none_match: значение заголовка If-None-Match: '*' или список ETag через запятую
+    :return: True, если у клиента актуальная версия ответа
+    """
+
+    if if_none_match.strip() == '*':
+        return True
+
+    return etag.removeprefix('W/') in (
+        client_etag.strip().removeprefix('W/') for client_etag in if_none_match.split(',')
+    )
+
+
+class ConditionalGetMiddleware:
+    """
+    Заменяет ответ 200 на 304 без тела, если ETag ответа совпадает с If-None-Match запроса.
+
+    Ответы из кэша получают ETag вместе со значением, поэтому для них 304 отдается без обращения к Postgres и без
+    десериализации кэша; клиенту не передается тело ответа.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match_header = Headers(scope=scope).get('if-none-match')
+
+        if if_none_match_header is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Сужение типа не сохраняется внутри замыкания, поэтому значение заголовка передается в него как str.
+        if_none_match: str = if_none_match_header
+        is_not_modified = False
+
+        async def send_conditional(message: Message) -> None:
+            nonlocal is_not_modified
+
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(raw=message['headers'])
+                etag = headers.get('etag')
+
+                if message['status'] == 200 and etag is not None and is_etag_matched(etag, if_none_match):
+                    is_not_modified = True
+
+                    del headers['content-length']
+                    del headers['content-type']
+
+                    message = {**message, 'status': 304, 'headers': headers.raw}
+
+                await send(message)
+
+            elif is_not_modified:
+                # Тело ответа не передается: отправляется только завершающее пустое сообщение.
+                if not message.get('more_body', False):
+                    await send({'type': 'http.response.body', 'body': b''})
+
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_conditional)
@@ -13,7 +13,101 @@ DB_NAME = os.environ.get('DB_NAME')
 DB_HOST = os.environ.get('DB_HOST')
 DB_PORT = os.environ.get('DB_PORT')
 
+# Реплика Postgres для чтения: через нее GET запросы собирают значения кэша. Если хост не задан, чтение идет через
+# основную БД.
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+DB_REPLICA_PORT = os.environ.get('DB_REPLICA_PORT', DB_PORT)
+# Сколько секунд после записи чтение идет через основную БД (read-your-writes): окно должно превышать задержку
+# репликации.
+DB_READ_YOUR_WRITES_WINDOW = float(os.environ.get('DB_READ_YOUR_WRITES_WINDOW', 5))
+
+# Пул соединений SQLAlchemy создается в каждом процессе (воркере gunicorn, процессе синхронизации), поэтому
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) * количество процессов не должно превышать max_connections Postgres.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+# Сколько секунд запрос ждет свободное соединение, прежде чем получить ошибку.
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+# Соединения старше этого времени (сек) пересоздаются. -1 - без ограничения.
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+# Проверка соединения (SELECT 1) при каждой выдаче из пула: защищает от разорванных соединений ценой запроса.
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'false').lower() == 'true'
+# Размер кэша подготовленных выражений на соединение (asyncpg и SQLAlchemy). 0 - кэш выключен.
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100))
+# Подключение через PgBouncer в режиме transaction: соединение Postgres меняется между транзакциями, поэтому кэш
+# подготовленных выражений выключается, а выражения получают уникальные имена.
+DB_PGBOUNCER_TRANSACTION_MODE = os.environ.get('DB_PGBOUNCER_TRANSACTION_MODE', 'false').lower() == 'true'
+
 REDIS_HOST = os.environ.get('REDIS_HOST')
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+
+# Кэш в памяти процесса (L1): максимальное число записей и время жизни записи в секундах.
+# Время жизни - верхняя граница устаревания L1, если сообщение об инвалидации не дошло до воркера.
+CACHE_LOCAL_MAXSIZE = int(os.environ.get('CACHE_LOCAL_MAXSIZE', 1024))
+CACHE_LOCAL_TTL = float(os.environ.get('CACHE_LOCAL_TTL', 5))
+CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache_invalidation')
+
+# Префикс всех ключей и каналов приложения в Redis и размер порции ключей при очистке кэша.
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'menu_app:')
+CACHE_PURGE_BATCH_SIZE = int(os.environ.get('CACHE_PURGE_BATCH_SIZE', 500))
+
+# Значения кэша не меньше этого размера (в байтах) сжимаются zstd с указанным уровнем. 0 - сжатие выключено.
+CACHE_COMPRESSION_THRESHOLD = int(os.environ.get('CACHE_COMPRESSION_THRESHOLD', 4096))
+CACHE_COMPRESSION_LEVEL = int(os.environ.get('CACHE_COMPRESSION_LEVEL', 3))
+
+# Время жизни блокировки на пересборку ключа кэша и интервал проверки кэша воркерами, ожидающими пересборку (сек).
+CACHE_LOCK_TIMEOUT = float(os.environ.get('CACHE_LOCK_TIMEOUT', 10))
+CACHE_LOCK_POLL_INTERVAL = float(os.environ.get('CACHE_LOCK_POLL_INTERVAL', 0.05))
+
+# Сколько секунд после инвалидации агрегирующего ключа можно отдавать его предыдущее значение, пока новое собирается
+# в фоне (stale-while-revalidate). 0 - режим выключен, значение пересобирается во время запроса.
+CACHE_STALE_TTL = {
+    'menus_detail': int(os.environ.get('CACHE_STALE_TTL_MENUS_DETAIL', 0)),
+    'menus': int(os.environ.get('CACHE_STALE_TTL_MENUS', 0)),
+    'submenus': int(os.environ.get('CACHE_STALE_TTL_SUBMENUS', 0)),
+    'dishes': int(os.environ.get('CACHE_STALE_TTL_DISHES', 0)),
+}
+
+# Время жизни ключей кэша в секундах. Ключи устаревших версий не удаляются явно и истекают по этому времени.
+CACHE_TTL = int(os.environ.get('CACHE_TTL', 3600))
+
+# Время жизни ключей по семействам (первая часть ключа до двоеточия). 0 - без ограничения: table_cache хранит
+# последнее состояние таблицы Google Sheets и должен переживать простои синхронизации. tree - хэши с поддеревьями
+# меню: все значения меню, его подменю и блюд живут столько же, сколько хэш.
+CACHE_TTL_BY_FAMILY = {
+    'menus_detail': int(os.environ.get('CACHE_TTL_MENUS_DETAIL', CACHE_TTL)),
+    'menus': int(os.environ.get('CACHE_TTL_MENUS', CACHE_TTL)),
+    'tree': int(os.environ.get('CACHE_TTL_TREE', CACHE_TTL)),
+    'table_cache': int(os.environ.get('CACHE_TTL_TABLE_CACHE', 0)),
+}
+
+# Доля времени жизни, до которой к нему добавляется случайная надбавка, чтобы ключи не истекали одновременно.
+CACHE_TTL_JITTER = float(os.environ.get('CACHE_TTL_JITTER', 0.1))
+
+# PATCH обновляет значения в кэше на месте (write-through) вместо инвалидации пространств имен.
+CACHE_WRITE_THROUGH = os.environ.get('CACHE_WRITE_THROUGH', 'true').lower() == 'true'
+# Сколько раз повторяется обновление на месте, прерванное параллельной записью в тот же ключ, и начальная пауза между
+# попытками в секундах (удваивается с каждой попыткой). После последней попытки инвалидируются пространства имен.
+CACHE_WRITE_THROUGH_RETRIES = int(os.environ.get('CACHE_WRITE_THROUGH_RETRIES', 3))
+CACHE_WRITE_THROUGH_RETRY_BACKOFF = float(os.environ.get('CACHE_WRITE_THROUGH_RETRY_BACKOFF', 0.005))
+
+# Ответы GET /menus/detail и GET /menus/{id}/submenus собирает Postgres (json_build_object/json_agg): приложение
+# отдает готовую строку JSON без создания объектов моделей и словарей.
+SQL_JSON_RENDERING = os.environ.get('SQL_JSON_RENDERING', 'false').lower() == 'true'
+
+# Сколько меню прогрев кэша обрабатывает одновременно (формирование ключей требует обращений к Redis).
+CACHE_WARMUP_CONCURRENCY = int(os.environ.get('CACHE_WARMUP_CONCURRENCY', 10))
+
+# Каталог, в который воркеры gunicorn пишут метрики Prometheus, чтобы /metrics собирал значения всех воркеров. Его
+# задает и очищает при запуске docker/app.sh. Если каталог не задан, /metrics отдает метрики текущего процесса.
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+# Бюджет памяти Redis по семействам ключей в байтах. При превышении отчет /cache/memory пишет предупреждение в лог.
+CACHE_MEMORY_BUDGET = {
+    'menus_detail': int(os.environ.get('CACHE_MEMORY_BUDGET_MENUS_DETAIL', 16 * 1024 * 1024)),
+    'menus': int(os.environ.get('CACHE_MEMORY_BUDGET_MENUS', 1024 * 1024)),
+    'tree': int(os.environ.get('CACHE_MEMORY_BUDGET_TREE', 104 * 1024 * 1024)),
+    'table_cache': int(os.environ.get('CACHE_MEMORY_BUDGET_TABLE_CACHE', 8 * 1024 * 1024)),
+}
 
 TEST_DB_USER = os.environ.get('TEST_DB_USER')
 TEST_DB_PASSWORD = os.environ.get('TEST_DB_PASSWORD')
@@ -2,15 +2,39 @@
 Модуль для расширения APIRouter..
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 06 февраля 2024
+Дата: 17 октября 2026 | Маршрут запроса для метрик кэша
 """
 
-from fastapi import APIRouter
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import APIRouter, Request, Response
+from fastapi.routing import APIRoute
+from metrics import current_route
 from starlette.routing import NoMatchFound
 
 
+class MetricsRoute(APIRoute):
+    """
+    Маршрут, который перед вызовом обработчика сохраняет его название в контекст запроса. По этому названию
+    размечаются метрики кэша, в том числе записанные фоновыми задачами запроса.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+        # Название функции, а не name маршрута: name переопределяется для reverse (menu_base_url и т.п.).
+        route_name = self.endpoint.__name__
+
+        async def metrics_route_handler(request: Request) -> Response:
+            current_route.set(route_name)
+            return await route_handler(request)
+
+        return metrics_route_handler
+
+
 class CustomAPIRouter(APIRouter):
     def __init__(self, *args, **kwargs):
+        kwargs.setdefault('route_class', MetricsRoute)
         super().__init__(*args, **kwargs)
         self.routes_data = {}
 
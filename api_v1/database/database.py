@@ -2,30 +2,184 @@
 Модуль для создания подключения к базе данных.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 02 февраля 2024 | Рефакторинг
+Дата: 17 октября 2026 | Реплика для чтения и read-your-writes
 """
 
-from typing import AsyncGenerator
+import time
+import uuid
+from typing import Any, AsyncGenerator
 
-from config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
-from sqlalchemy import MetaData
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from config import (
+    DB_HOST,
+    DB_MAX_OVERFLOW,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_PGBOUNCER_TRANSACTION_MODE,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PORT,
+    DB_READ_YOUR_WRITES_WINDOW,
+    DB_REPLICA_HOST,
+    DB_REPLICA_PORT,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_USER,
+)
+from fastapi import Request
+from metrics import db_pool_checked_out, db_pool_checkout_latency, db_pool_saturation
+from sqlalchemy import AsyncAdaptedQueuePool, MetaData
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 DATABASE_URL = (
     f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 )
+REPLICA_DATABASE_URL = (
+    f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}'
+)
+
+# Cookie клиента, который недавно выполнил запись: его чтения идут через основную БД.
+READ_PRIMARY_COOKIE = 'read_primary'
 
 Base = declarative_base()
 metadata = MetaData()
 
-engine = create_async_engine(DATABASE_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который записывает в метрики время ожидания свободного соединения.
+    """
+
+    pool_name = 'primary'
+
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_latency.labels(pool=self.pool_name).observe(time.perf_counter() - started_at)
+
+    def recreate(self) -> 'InstrumentedQueuePool':
+        # Пул пересоздается при dispose() движка: название пула для метрик переносится в новый.
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+
+        return pool
+
+
+def get_connect_args() -> dict[str, Any]:
+    """
+    Формирует параметры подключения asyncpg с учетом кэша подготовленных выражений и режима PgBouncer.
+
+    :return: параметры подключения
+    """
+
+    if DB_PGBOUNCER_TRANSACTION_MODE:
+        # В режиме transaction PgBouncer выполняет транзакции на разных соединениях Postgres: подготовленное
+        # выражение может не найтись или совпасть по имени с выражением другого клиента.
+        return {
+            'statement_cache_size': 0,
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid.uuid4()}__',
+        }
+
+    return {
+        'statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+        'prepared_statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def create_database_engine(url: str, pool_name: str = 'primary') -> AsyncEngine:
+    """
+    Создает движок с пулом соединений из настроек DB_POOL_* и регистрирует метрики пула: количество выданных
+    соединений и долю от максимального размера пула.
+
+    :param url: адрес базы данных
+    :param pool_name: название пула в метриках
+    :return: движок
+    """
+
+    database_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=get_connect_args(),
+    )
+    database_engine.pool.pool_name = pool_name
+
+    # Значения читаются при сборе метрик из текущего пула движка.
+    pool_capacity = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+
+    db_pool_checked_out.labels(pool=pool_name).set_function(lambda: database_engine.pool.checkedout())
+    db_pool_saturation.labels(pool=pool_name).set_function(
+        lambda: database_engine.pool.checkedout() / pool_capacity if pool_capacity else 0
+    )
+
+    return database_engine
+
+
+engine = create_database_engine(DATABASE_URL)
 async_session_maker = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+replica_engine = create_database_engine(REPLICA_DATABASE_URL, pool_name='replica') if DB_REPLICA_HOST else engine
+async_read_session_maker = sessionmaker(
+    bind=replica_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Время (time.monotonic()), до которого этот процесс читает через основную БД: изменения недавней записи могли еще
+# не дойти до реплики, а собранное из реплики значение сохранилось бы в кэш под новой версией.
+primary_reads_until = 0.0
+
+
+def route_reads_to_primary() -> None:
+    """
+    Направляет чтения этого процесса в основную БД на DB_READ_YOUR_WRITES_WINDOW секунд. Вызывается при записи и
+    при получении сообщения об инвалидации кэша от любого процесса.
+
+    :return: None
+    """
+    global primary_reads_until
+
+    primary_reads_until = time.monotonic() + DB_READ_YOUR_WRITES_WINDOW
+
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """Функция для получения асинхронной сессии подключения к БД."""
     async with async_session_maker() as session:
         yield session
+
+
+def get_read_session_maker(is_primary_required: bool = False) -> sessionmaker:
+    """
+    Выбирает фабрику сессий для чтения: реплику, а в течение DB_READ_YOUR_WRITES_WINDOW секунд после записи любым
+    процессом - основную БД.
+
+    :param is_primary_required: True, если чтение должно идти через основную БД независимо от окна
+    :return: фабрика сессий
+    """
+
+    if is_primary_required or time.monotonic() < primary_reads_until:
+        return async_session_maker
+
+    return async_read_session_maker
+
+
+async def get_async_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Функция для получения асинхронной сессии для чтения: через реплику, а в течение DB_READ_YOUR_WRITES_WINDOW секунд
+    после записи (этим клиентом или любым процессом) - через основную БД.
+
+    :param request: запрос
+    :return: сессия подключения к БД
+    """
+
+    async with get_read_session_maker(is_primary_required=READ_PRIMARY_COOKIE in request.cookies)() as session:
+        yield session
@@ -2,31 +2,38 @@
 Cлой для работы с БД.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 08 февраля 2024 | Реализация и вывода всех меню со всеми связанными подменю и со всеми связанными блюдами.
+Дата: 17 октября 2026 | Проверка связи подменю с меню через EXISTS
 """
+import uuid
+from decimal import Decimal
 from typing import Any
 
 from database.database import get_async_session
-from dish.models import Dish
+from dish.models import Dish, DishDiscount
 from dish.schemas import UpdateDish
 from fastapi import Depends
 from menu.models import Menu
 from menu.schemas import MenuUpdate
 from sqlalchemy import (
     Boolean,
+    ColumnElement,
     Result,
+    String,
+    Text,
     and_,
     cast,
     delete,
     distinct,
+    exists,
     func,
     insert,
+    literal_column,
     select,
     update,
 )
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import selectinload
 from submenu.models import Submenu
 from submenu.schemas import UpdateSubmenu
 from utils import get_created_object_dict
@@ -34,7 +41,7 @@ from utils import get_created_object_dict
 
 async def insert_data(
         data_dict: dict[Any, Any],
-        database_model: Menu | Submenu | Dish,
+        database_model: Menu | Submenu | Dish | DishDiscount,
         session: AsyncSession = Depends(get_async_session)
 ) -> dict[Any, Any]:
     """
@@ -49,11 +56,13 @@ async def insert_data(
 
     """
 
-    stmt = insert(database_model).values(data_dict).returning(database_model)
+    # Возвращаем только колонки таблицы: RETURNING всей сущности захватил бы column_property с коррелированным
+    # подзапросом (цена блюда со скидкой), который нельзя выполнить в INSERT.
+    stmt = insert(database_model).values(data_dict).returning(*database_model.__table__.columns)
 
     result = await session.execute(stmt)
 
-    created_object = result.scalars().all()[0]
+    created_object = database_model(**result.mappings().one())
 
     created_object_dict = get_created_object_dict(
         created_object=created_object)
@@ -65,20 +74,132 @@ async def insert_data(
 
 async def select_all_menus_detail(session: AsyncSession = Depends(get_async_session)) -> list[Menu]:
     """
-    Осуществляет выборку всех меню со всеми связанными подменю и блюдами;
+    Осуществляет выборку всех меню со всеми связанными подменю и блюдами тремя запросами (по одному на таблицу)
+    независимо от количества меню и подменю. Используется в GET /menus/detail и для прогрева кэша.
 
     :param session: сессия подключения к БД
-    :return: список со всеми меню с отображением привязанных подменю и блюд
+    :return: список меню с загруженными submenus и submenus[].dishes
     """
 
-    stmt = select(Menu).outerjoin(Submenu, Submenu.menu_id == Menu.id).options(joinedload(Menu.submenus))
+    stmt = select(Menu).options(selectinload(Menu.submenus).selectinload(Submenu.dishes))
     result: Result = await session.execute(stmt)
 
-    menus = result.unique().scalars().all()
+    menus = result.scalars().all()
 
     return menus
 
 
+def json_object(**fields: Any) -> ColumnElement[Any]:
+    """
+    Формирует выражение json_build_object с ключами в порядке переданных полей. Ключи подставляются в запрос
+    литералами, а не параметрами: для параметров variadic-функции Postgres не может определить тип.
+
+    :param fields: ключ JSON: SQL выражение значения
+    :return: SQL выражение объекта JSON
+    """
+
+    arguments = []
+
+    for key, value in fields.items():
+        arguments += [literal_column(f"'{key}'"), value]
+
+    return func.json_build_object(*arguments)
+
+
+def json_array(element: ColumnElement[Any]) -> ColumnElement[Any]:
+    """
+    Формирует выражение json_agg, которое для пустой выборки возвращает пустой массив, а не NULL.
+
+    :param element: SQL выражение элемента массива
+    :return: SQL выражение массива JSON
+    """
+
+    return func.coalesce(func.json_agg(element), literal_column("'[]'::json"))
+
+
+def submenu_json_object() -> ColumnElement[Any]:
+    """
+    Формирует выражение объекта подменю в формате ответа (как format_submenu): поля подменю, блюда с ценой с учетом
+    скидки и количество блюд. Блюда и их количество выбираются коррелированными подзапросами по подменю.
+
+    :return: SQL выражение объекта JSON
+    """
+
+    dishes = (
+        select(
+            json_array(
+                json_object(
+                    id=Dish.id,
+                    title=Dish.title,
+                    description=Dish.description,
+                    price=cast(Dish.price_with_discount, String),
+                    submenu_id=Dish.submenu_id,
+                )
+            )
+        )
+        .where(Dish.submenu_id == Submenu.id)
+        .correlate(Submenu)
+        .scalar_subquery()
+    )
+    dishes_count = select(func.count(Dish.id)).where(Dish.submenu_id == Submenu.id).correlate(Submenu).scalar_subquery()
+
+    return json_object(
+        id=Submenu.id,
+        title=Submenu.title,
+        description=Submenu.description,
+        dishes=dishes,
+        menu_id=Submenu.menu_id,
+        dishes_count=dishes_count,
+    )
+
+
+async def select_all_menus_detail_json(session: AsyncSession = Depends(get_async_session)) -> bytes:
+    """
+    Собирает ответ GET /menus/detail одним запросом: документ JSON со всеми меню, подменю и блюдами строит Postgres,
+    объекты моделей не создаются.
+
+    :param session: сессия подключения к БД
+    :return: строка JSON в байтах
+    """
+
+    submenus = (
+        select(json_array(submenu_json_object()))
+        .where(Submenu.menu_id == Menu.id)
+        .correlate(Menu)
+        .scalar_subquery()
+    )
+    stmt = select(
+        cast(
+            json_array(json_object(id=Menu.id, title=Menu.title, description=Menu.description, submenus=submenus)),
+            Text,
+        )
+    )
+
+    result: Result = await session.execute(stmt)
+
+    return result.scalar_one().encode()
+
+
+async def select_all_submenus_json(
+        target_menu_id: str, session: AsyncSession = Depends(get_async_session)
+) -> bytes:
+    """
+    Собирает ответ GET /menus/{target_menu_id}/submenus одним запросом: документ JSON строит Postgres.
+
+    :param target_menu_id: идентификатор меню, для которого идет поиск подменю
+    :param session: сессия подключения к БД
+    :return: строка JSON в байтах
+    """
+
+    stmt = select(cast(json_array(submenu_json_object()), Text)).where(
+        cast(Submenu.menu_id == target_menu_id, Boolean)
+    )
+
+    result: Result = await session.execute(stmt)
+
+    return result.scalar_one().encode()
+
+
 async def select_all_menus(session: AsyncSession = Depends(get_async_session)) -> list[Menu]:
     """
     Функция для выборки всех меню из таблицы menus.
@@ -212,21 +333,34 @@ async def select_all_submenus(
         target_menu_id: str, session: AsyncSession = Depends(get_async_session)
 ) -> list[Submenu]:
     """
-    Функция для выборки всех подменю привязанных к указанному меню.
+    Функция для выборки всех подменю привязанных к указанному меню вместе с количеством блюд. Выполняется двумя
+    запросами независимо от количества подменю: подменю с количеством блюд (GROUP BY) и блюда всех подменю.
 
     Args:
         target_menu_id: идентификатор меню, для которого идет поиск подменю
         session: сессия подключения к БД.
 
-    Returns: объект найденных подменю
+    Returns: объект найденных подменю с атрибутом selected_dishes_count
 
     """
 
-    stmt = select(Submenu).where(cast(Submenu.menu_id == target_menu_id, Boolean))
+    stmt = (
+        select(Submenu, func.count(Dish.id).label('dishes_count'))
+        .outerjoin(Dish, Dish.submenu_id == Submenu.id)
+        .where(cast(Submenu.menu_id == target_menu_id, Boolean))
+        .group_by(Submenu.id)
+        .options(selectinload(Submenu.dishes))
+    )
 
     result: Result = await session.execute(stmt)
 
-    submenus = result.scalars().all()
+    submenus = []
+
+    for submenu, dishes_count in result.all():
+        # Submenu.json() добавляет атрибут dishes_count в ответ, поэтому количество хранится под другим именем и
+        # используется только при форматировании списка.
+        submenu.selected_dishes_count = dishes_count
+        submenus.append(submenu)
 
     return submenus
 
@@ -407,7 +541,7 @@ async def update_dish(
         target_dish_id: str,
         update_data: UpdateDish,
         session: AsyncSession = Depends(get_async_session),
-) -> Dish:
+) -> tuple[Dish, Decimal]:
     """
     Функция для обновления данных в БД.
 
@@ -417,24 +551,25 @@ async def update_dish(
         update_data: данные, на которые нужно обновить текущие.
         session: сессия подключения к БД.
 
-    Returns: объект с обновленными данными.
+    Returns: объект с обновленными данными и цена блюда с учетом скидки.
 
     """
 
     # Формируем SQL код, который найдет блюдо с submenu_id == target_submenu_id и id == target_dish_id
+    # Цена со скидкой возвращается тем же запросом.
     stmt = (
         update(Dish)
         .where(and_(Dish.submenu_id == target_submenu_id, Dish.id == target_dish_id))
         .values(**update_data.model_dump())
-    ).returning(Dish)
+    ).returning(Dish, Dish.price_with_discount)
 
     result = await session.execute(stmt)
 
-    updated_dish: Dish = result.scalars().all()[0]
+    updated_dish, price_with_discount = result.all()[0]
 
     await session.commit()
 
-    return updated_dish
+    return updated_dish, price_with_discount
 
 
 async def delete_dish(
@@ -462,33 +597,35 @@ async def delete_dish(
     await session.commit()
 
 
-async def select_submenus_for_menu(
-        submenu: Submenu,
+async def is_submenu_linked_to_menu(
         target_menu_id: str,
+        target_submenu_id: str,
         session: AsyncSession = Depends(get_async_session),
-) -> list[Submenu]:
+) -> bool:
     """
-    Получает все подменю для меню, id которого было передано
+    Проверяет одним запросом EXISTS по первичному ключу, привязано ли подменю к меню. Строки подменю и блюд
+    не загружаются.
 
     Args:
-        submenu: класс модели БД Submenu,
         target_menu_id: идентификатор меню, к которому должно быть привязано подменю,
-        session: сессия подключения к БД,
-        target_submenu_id: идентификатор подменю, к которому должно быть привязано блюдо
+        target_submenu_id: идентификатор подменю,
+        session: сессия подключения к БД
     :return:
-        Список с найденным подменю или пустой список.
+        True, если подменю привязано к меню, иначе False.
     """
-    # Формируем запрос для нахождения всех подменю, которые привязаны к меню с id равным target_menu_id.
-    stmt_submenus_linked_to_target_menu_id = select(submenu).where(
-        cast(submenu.menu_id == target_menu_id, Boolean)
-    )
 
-    result_submenus_linked_to_target_menu_id = await session.execute(
-        stmt_submenus_linked_to_target_menu_id
-    )
+    try:
+        # Некорректный UUID Postgres отклонил бы с ошибкой, которая прерывает транзакцию сессии.
+        target_menu_uuid = uuid.UUID(target_menu_id)
+        target_submenu_uuid = uuid.UUID(target_submenu_id)
+    except ValueError:
+        return False
 
-    submenus_linked_to_target_menu_id = (
-        result_submenus_linked_to_target_menu_id.scalars().all()
+    stmt = select(
+        exists().where(
+            Submenu.id == target_submenu_uuid,
+            Submenu.menu_id == target_menu_uuid,
+        )
     )
 
-    return submenus_linked_to_target_menu_id
+    return bool(await session.scalar(stmt))
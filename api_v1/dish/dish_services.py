@@ -2,32 +2,29 @@
 Бизнес логика, специфичная для модуля.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 06 февраля 2024
+Дата: 17 октября 2026 | Связь подменю с меню проверяется запросом EXISTS
 """
 from typing import Any
 
 from database.database import get_async_session
-from database.database_services import select_submenus_for_menu
+from database.database_services import is_submenu_linked_to_menu
 from dish.models import Dish
 from fastapi import Depends
 from sqlalchemy import ChunkedIteratorResult
 from sqlalchemy.ext.asyncio import AsyncSession
-from submenu.models import Submenu
 
 from .dish_utils import format_decimal
 
 
 async def is_submenu_in_target_menu(
-        submenu: type[Submenu],
         target_menu_id: str,
         target_submenu_id: str,
         session: AsyncSession = Depends(get_async_session),
 ) -> bool:
     """
-    Функция для проверки соответствия связи между меню и подменю.
+    Функция для проверки соответствия связи между меню и подменю. Выполняет один запрос EXISTS без загрузки строк.
 
     Args:
-        submenu: класс модели БД Submenu;
         target_menu_id: идентификатор меню, к которому должно быть привязано подменю
         session: сессия подключения к БД;
         target_submenu_id: идентификатор подменю, к которому должно быть привязано блюдо
@@ -36,19 +33,12 @@ async def is_submenu_in_target_menu(
 
     """
 
-    submenus_linked_to_target_menu_id = await select_submenus_for_menu(
-        submenu=submenu,
+    return await is_submenu_linked_to_menu(
         target_menu_id=target_menu_id,
-        session=session
+        target_submenu_id=target_submenu_id,
+        session=session,
     )
 
-    if submenus_linked_to_target_menu_id:
-        for submenu in submenus_linked_to_target_menu_id:
-            if str(submenu.id) == target_submenu_id:
-                return True
-
-    return False
-
 
 async def try_get_dish(result: ChunkedIteratorResult) -> Dish | bool:
     """
@@ -67,18 +57,18 @@ async def try_get_dish(result: ChunkedIteratorResult) -> Dish | bool:
 
 async def generate_dish_dict(dish: Dish) -> dict[Any, Any]:
     """
-    Формирует словарь на основе данных объекта блюда из БД
+    Формирует словарь на основе данных объекта блюда из БД. Цена указывается с учетом скидки
 
     :param dish: объект Dish
     :return: словарь с данными о блюде
     """
 
     dish_dict = {
-        'id': str(dish.id),
+        'id': dish.id,
         'title': dish.title,
         'description': dish.description,
-        'price': format_decimal(dish.price),
-        'submenu_id': str(dish.submenu_id),
+        'price': format_decimal(dish.price_with_discount),
+        'submenu_id': dish.submenu_id,
     }
 
     return dish_dict
@@ -2,18 +2,35 @@
 Модуль для описания модели таблицы БД, содержащей данные о блюдах.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 06 февраля 2024
+Дата: 17 октября 2026 | Индекс (submenu_id, id)
 """
 
 import uuid
+from typing import Any
 
-from sqlalchemy import DECIMAL, UUID, Column, ForeignKey, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import DECIMAL, UUID, Column, ForeignKey, Index, String, func, select
+from sqlalchemy.orm import column_property, relationship
 from submenu.models import Base
 
 
+class DishDiscount(Base):
+    __tablename__ = 'dish_discounts'
+
+    dish_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(column='dishes.id', ondelete='CASCADE'),
+        primary_key=True,
+        nullable=False,
+    )
+
+    # Размер скидки в процентах (столбец G гугл таблицы).
+    discount = Column(DECIMAL(precision=5, scale=2), nullable=False)
+
+
 class Dish(Base):
     __tablename__ = 'dishes'
+    # Выборки блюд фильтруют и соединяют по submenu_id (и id): индекс покрывает и внешний ключ.
+    __table_args__ = (Index('ix_dishes_submenu_id_id', 'submenu_id', 'id'),)
 
     id = Column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False
@@ -32,7 +49,23 @@ class Dish(Base):
 
     submenu = relationship(argument='Submenu', back_populates='dishes')
 
-    async def json(self) -> dict[str, str]:
+    # Цена со скидкой вычисляется в Postgres в каждой выборке блюд, поэтому ответам не нужны обращения к Redis.
+    price_with_discount = column_property(
+        func.round(
+            price * (
+                100 - func.coalesce(
+                    select(DishDiscount.discount)
+                    .where(DishDiscount.dish_id == id)
+                    .correlate_except(DishDiscount)
+                    .scalar_subquery(),
+                    0,
+                )
+            ) / 100,
+            2,
+        )
+    )
+
+    async def json(self) -> dict[str, Any]:
         """
         Формирует словарь из данных модели
 
@@ -40,9 +73,9 @@ class Dish(Base):
         """
 
         return {
-            'id': str(self.id),
+            'id': self.id,
             'title': self.title,
             'description': self.description,
-            'price': str(self.price),
-            'submenu_id': str(self.submenu_id),
+            'price': self.price_with_discount,
+            'submenu_id': self.submenu_id,
         }
@@ -3,12 +3,12 @@
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
 
-Дата: 11 февраля 2024 | Добавлена очистка кэша с инфой о синхронизации с таблицей при выполнении CUD методов
+Дата: 17 октября 2026 | Сборка значения для кэша получает сессию аргументом
 """
 from typing import Any
 
 from custom_router import CustomAPIRouter
-from database.database import get_async_session
+from database.database import get_async_read_session, get_async_session
 from database.database_services import (
     delete_dish,
     insert_data,
@@ -21,14 +21,18 @@ from dish.dish_services import (
     is_submenu_in_target_menu,
     try_get_dish,
 )
-from dish.dish_utils import apply_discount, return_404_menu_not_linked_to_submenu
+from dish.dish_utils import format_decimal, return_404_menu_not_linked_to_submenu
 from dish.models import Dish
 from dish.schemas import CreateDish, UpdateDish
-from fastapi import BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
-from services import create_cache, delete_cache_by_key, get_cache
+from fastapi import Depends
+from serialization import ORJSONResponse
+from services import (
+    CacheInvalidation,
+    CacheRevalidation,
+    get_or_create_cache,
+    get_versioned_cache_key,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from submenu.models import Submenu
 from submenu.submenu_utils import format_dishes
 from utils import create_dict_from_received_data, get_created_object_dict
 
@@ -39,7 +43,8 @@ router = CustomAPIRouter(prefix='/api/v1/menus', tags=['Dish'])
 async def dish_get_method(
     target_menu_id: str,
     target_submenu_id: str,
-    session: AsyncSession = Depends(get_async_session),
+    cache_revalidation: CacheRevalidation = Depends(),
+    session: AsyncSession = Depends(get_async_read_session),
 ) -> list[dict[Any, Any]]:
     """
     Функция для обработки get запроса для получения блюд привязанных к подменю.
@@ -47,30 +52,29 @@ async def dish_get_method(
     Args:
         target_menu_id: идентификатор меню, к которому привязано submenu
         target_submenu_id: идентификатор подменю, к которому привязано блюдо
+        cache_revalidation: кэш с поддержкой stale-while-revalidate
         session:
 
     Returns: Список объектов найденных блюд.
 
     """
-    cache_key = target_menu_id + '_' + target_submenu_id + '_dishes'
-
-    cache = await get_cache(key=cache_key)
-
-    if cache is not None:
-        return cache
-
-    dishes = await select_all_dishes(
-        target_menu_id=target_menu_id,
-        target_submenu_id=target_submenu_id,
-        session=session,
+    cache_key = await get_versioned_cache_key(
+        'dishes',
+        target_submenu_id,
+        menu_id=target_menu_id,
+        submenu_id=target_submenu_id
     )
 
-    formatted_dishes = await format_dishes(dishes)
-    dishes_with_discount = await apply_discount(formatted_dishes)
+    async def build_dishes(session: AsyncSession) -> list[dict[Any, Any]]:
+        dishes = await select_all_dishes(
+            target_menu_id=target_menu_id,
+            target_submenu_id=target_submenu_id,
+            session=session,
+        )
 
-    await create_cache(key=cache_key, value=dishes_with_discount)
+        return await format_dishes(dishes)
 
-    return dishes_with_discount
+    return await cache_revalidation.get_or_create_cache(key=cache_key, build=build_dishes, session=session)
 
 
 @router.post('/{target_menu_id}/submenus/{target_submenu_id}/dishes')
@@ -78,9 +82,9 @@ async def dish_post_method(
     target_menu_id: str,
     target_submenu_id: str,
     dish_data: CreateDish,
-    background_tasks: BackgroundTasks,
+    cache_invalidation: CacheInvalidation = Depends(),
     session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки POST запроса.
 
@@ -88,16 +92,15 @@ async def dish_post_method(
         target_menu_id: идентификатор меню с привязанным подменю, в котором создается блюдо;
         target_submenu_id: идентификатор подменю, в котором создается блюдо;
         dish_data: данные, которые должны записаться в новой записи в таблице dishes;
-        background_tasks: Объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse.
+    Returns: ORJSONResponse.
 
     """
 
     # Проверяем привязано ли указанное подменю к указанному меню.
     submenu_in_target_menu = await is_submenu_in_target_menu(
-        submenu=Submenu,
         target_menu_id=target_menu_id,
         target_submenu_id=target_submenu_id,
         session=session,
@@ -116,17 +119,10 @@ async def dish_post_method(
         data_dict=dish_data_dict, database_model=Dish, session=session
     )
 
-    dishes_cache_key = target_menu_id + '_' + target_submenu_id + '_dishes'
-    submenus_cache_key = target_menu_id + '_submenus'
-
-    background_tasks.add_task(delete_cache_by_key, dishes_cache_key)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, target_menu_id)
-    background_tasks.add_task(delete_cache_by_key, submenus_cache_key)
-    background_tasks.add_task(delete_cache_by_key, target_submenu_id)
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    cache_invalidation.invalidate_namespaces(menu_id=target_menu_id, submenu_id=target_submenu_id)
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content=created_dish_dict, status_code=201)
+    return ORJSONResponse(content=created_dish_dict, status_code=201)
 
 
 @router.get('/{target_menu_id}/submenus/{target_submenu_id}/dishes/{target_dish_id}')
@@ -134,8 +130,8 @@ async def dish_get_specific_method(
     target_menu_id: str,
     target_submenu_id: str,
     target_dish_id: str,
-    session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+    session: AsyncSession = Depends(get_async_read_session),
+) -> ORJSONResponse:
     """
     Функция для получения определенного блюда.
 
@@ -145,35 +141,35 @@ async def dish_get_specific_method(
         target_dish_id: идентификатор блюда, которое необходимо получить.
         session: сессия подключения к БД.
 
-    Returns: JSONResponse
+    Returns: ORJSONResponse
 
     """
 
-    cache_key = target_menu_id + '_' + target_submenu_id + '_' + target_dish_id
-
-    cache = await get_cache(key=cache_key)
-
-    if cache is not None:
-        return cache
-
-    result = await select_specific_dish(
-        target_menu_id=target_menu_id,
-        target_submenu_id=target_submenu_id,
-        target_dish_id=target_dish_id,
-        session=session,
+    cache_key = await get_versioned_cache_key(
+        'dish',
+        target_submenu_id + '_' + target_dish_id,
+        menu_id=target_menu_id,
+        submenu_id=target_submenu_id
     )
 
-    dish = await try_get_dish(result=result)
+    async def build_dish() -> dict[Any, Any] | None:
+        result = await select_specific_dish(
+            target_menu_id=target_menu_id,
+            target_submenu_id=target_submenu_id,
+            target_dish_id=target_dish_id,
+            session=session,
+        )
+
+        dish = await try_get_dish(result=result)
 
-    if not dish:
-        return JSONResponse(content={'detail': 'dish not found'}, status_code=404)
+        return await generate_dish_dict(dish=dish) if dish else None
 
-    dish_dict = await generate_dish_dict(dish=dish)
+    response = await get_or_create_cache(key=cache_key, build=build_dish)
 
-    dish_dict_with_discount = await apply_discount(dishes=[dish_dict])
+    if response is None:
+        return ORJSONResponse(content={'detail': 'dish not found'}, status_code=404)
 
-    await create_cache(key=cache_key, value=dish_dict_with_discount[0])
-    return JSONResponse(content=dish_dict_with_discount[0])
+    return response
 
 
 @router.patch('/{target_menu_id}/submenus/{target_submenu_id}/dishes/{target_dish_id}')
@@ -182,9 +178,9 @@ async def dish_patch_method(
     target_submenu_id: str,
     target_dish_id: str,
     dish_data: UpdateDish,
-    background_tasks: BackgroundTasks,
+    cache_invalidation: CacheInvalidation = Depends(),
     session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки PATCH запроса.
 
@@ -193,15 +189,14 @@ async def dish_patch_method(
         target_submenu_id: идентификатор подменю, в котором создается блюдо.
         target_dish_id: идентификатор блюда, которое необходимо получить.
         dish_data: новые данные для найденной записи в таблице dishes,
-        background_tasks: Объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse
+    Returns: ORJSONResponse
 
     """
 
     submenu_in_target_menu = await is_submenu_in_target_menu(
-        submenu=Submenu,
         target_menu_id=target_menu_id,
         target_submenu_id=target_submenu_id,
         session=session,
@@ -210,7 +205,7 @@ async def dish_patch_method(
     if not submenu_in_target_menu:
         return return_404_menu_not_linked_to_submenu()
 
-    updated_dish = await update_dish(
+    updated_dish, price_with_discount = await update_dish(
         target_dish_id=target_dish_id,
         target_submenu_id=target_submenu_id,
         update_data=dish_data,
@@ -218,21 +213,21 @@ async def dish_patch_method(
     )
 
     updated_dish_dict = get_created_object_dict(updated_dish)
+    updated_dish_dict['price'] = str(price_with_discount)
+
+    cache_invalidation.write_through(
+        fields={
+            'title': updated_dish.title,
+            'description': updated_dish.description,
+            'price': format_decimal(price_with_discount),
+        },
+        menu_id=target_menu_id,
+        submenu_id=target_submenu_id,
+        dish_id=target_dish_id,
+    )
+    cache_invalidation.delete('table_cache')
 
-    cache_key_all_dishes_for_submenu = target_menu_id + '_' + target_submenu_id + '_dishes'
-    cache_key_specific_dish = target_menu_id + '_' + target_submenu_id + '_' + target_dish_id
-    submenus_cache_key = target_menu_id + '_submenus'
-
-    background_tasks.add_task(delete_cache_by_key, cache_key_all_dishes_for_submenu)
-    background_tasks.add_task(delete_cache_by_key, cache_key_specific_dish)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, submenus_cache_key)
-    background_tasks.add_task(delete_cache_by_key, target_submenu_id)
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
-
-    updated_dish_dict_with_discount = await apply_discount(dishes=[updated_dish_dict])
-
-    return JSONResponse(content=updated_dish_dict_with_discount[0], status_code=200)
+    return ORJSONResponse(content=updated_dish_dict, status_code=200)
 
 
 @router.delete('/{target_menu_id}/submenus/{target_submenu_id}/dishes/{target_dish_id}')
@@ -240,9 +235,9 @@ async def dish_delete_method(
     target_menu_id: str,
     target_submenu_id: str,
     target_dish_id: str,
-    background_tasks: BackgroundTasks,
+    cache_invalidation: CacheInvalidation = Depends(),
     session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки DELETE запроса.
 
@@ -250,15 +245,14 @@ async def dish_delete_method(
         target_menu_id: идентификатор меню с привязанным подменю, в котором создается блюдо.
         target_submenu_id: идентификатор подменю, в котором создается блюдо.
         target_dish_id: идентификатор блюда, которое необходимо удалить.
-        background_tasks: объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse
+    Returns: ORJSONResponse
 
     """
 
     submenu_in_target_menu = await is_submenu_in_target_menu(
-        submenu=Submenu,
         target_menu_id=target_menu_id,
         target_submenu_id=target_submenu_id,
         session=session,
@@ -273,16 +267,7 @@ async def dish_delete_method(
         session=session,
     )
 
-    all_dishes_for_submenu_cache_key = target_menu_id + '_' + target_submenu_id + '_dishes'
-    specific_dish_cache_key = target_menu_id + '_' + target_submenu_id + '_' + target_dish_id
-    submenus_cache_key = target_menu_id + '_submenus'
-
-    background_tasks.add_task(delete_cache_by_key, all_dishes_for_submenu_cache_key)
-    background_tasks.add_task(delete_cache_by_key, specific_dish_cache_key)
-    background_tasks.add_task(delete_cache_by_key, target_submenu_id)
-    background_tasks.add_task(delete_cache_by_key, submenus_cache_key)
-    background_tasks.add_task(delete_cache_by_key, target_menu_id)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    cache_invalidation.invalidate_namespaces(menu_id=target_menu_id, submenu_id=target_submenu_id)
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content={'status': 'success!'}, status_code=200)
+    return ORJSONResponse(content={'status': 'success!'}, status_code=200)
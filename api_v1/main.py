@@ -2,17 +2,52 @@
 Модуль для подключения роутеров к приложению fastapi.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 06 февраля 2024
+Дата: 17 октября 2026 | Метрики всех воркеров gunicorn
 """
+import asyncio
 import json
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
 
+from cache_warmup import run_cache_warmup
+from conditional_get import ConditionalGetMiddleware
+from config import DB_REPLICA_HOST
 from dish.router import router as dish_router
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from menu.router import router as menu_router
+from metrics import generate_metrics
+from prometheus_client import CONTENT_TYPE_LATEST
+from read_your_writes import ReadYourWritesMiddleware
+from redis_tools.compression import compression_stats
+from redis_tools.local_cache import cache_stats, local_cache
+from redis_tools.tools import close_connection_pool, get_connection_pool
+from serialization import ORJSONResponse
+from services import get_cache_memory_report, listen_cache_invalidations
 from submenu.router import router as submenu_router
 
-app = FastAPI(title='Restaurant Menu')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """
+    Создает пул соединений с Redis и подписку на инвалидацию кэша при запуске приложения, закрывает их при остановке.
+    Кэш прогревается в фоне, чтобы приложение начинало принимать запросы, не дожидаясь прогрева.
+
+    :param app: приложение FastAPI
+    :return: None
+    """
+    get_connection_pool()
+    invalidation_listener = asyncio.create_task(listen_cache_invalidations())
+    cache_warmup = asyncio.create_task(run_cache_warmup())
+
+    yield
+
+    cache_warmup.cancel()
+    invalidation_listener.cancel()
+    await close_connection_pool()
+
+
+app = FastAPI(title='Restaurant Menu', lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,7 +55,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=['ETag'],
 )
+app.add_middleware(ConditionalGetMiddleware)
+
+if DB_REPLICA_HOST:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 
 def custom_openapi() -> None:
@@ -46,6 +86,45 @@ app.openapi = custom_openapi
 async def read_health():
     return {'status': 'OK'}
 
+
+@app.get('/cache/stats')
+async def read_cache_stats():
+    """
+    Статистика попаданий в кэш процесса (L1) и Redis (L2) и сжатия значений кэша для текущего воркера.
+
+    :return: счетчики и доля попаданий для каждого уровня
+    """
+    return {
+        **cache_stats.json(),
+        'l1_size': len(local_cache.data),
+        'l1_enabled': local_cache.enabled,
+        'compression': compression_stats.json(),
+    }
+
+
+@app.get('/cache/memory')
+async def read_cache_memory():
+    """
+    Память Redis, занятая ключами каждого семейства, и ее доля от бюджета CACHE_MEMORY_BUDGET. Служебные ключи
+    (копии stale-while-revalidate, блокировки) учитываются в семействе ключа, к которому относятся, счетчики версий -
+    в семействе version.
+
+    :return: словарь семейство: {keys, bytes, budget, budget_usage}
+    """
+    return await get_cache_memory_report()
+
+
+@app.get('/metrics')
+async def read_metrics():
+    """
+    Счетчики попаданий, промахов, записей и инвалидаций кэша и гистограммы длительности операций в формате
+    Prometheus, размеченные семейством ключа и маршрутом, а также ожидание соединения из пула БД, количество выданных
+    соединений и заполненность пула. Значения собираются со всех воркеров gunicorn (см. PROMETHEUS_MULTIPROC_DIR).
+
+    :return: метрики в текстовом формате Prometheus
+    """
+    return Response(content=generate_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 app.include_router(menu_router)
 app.include_router(submenu_router)
 app.include_router(dish_router)
@@ -2,36 +2,29 @@
 Функции специфичные для модуля не относящиеся к бизнес-логике.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 11 февраля 2024
+Дата: 17 октября 2026 | Подменю и блюда форматируются без обращений к БД
 """
 
 from typing import Any
 
-from database.database import get_async_session
-from fastapi import Depends
 from menu.models import Menu
-from sqlalchemy.ext.asyncio import AsyncSession
 from submenu.submenu_services import prepare_submenus_to_response
 
 
-async def format_detailed_menus(
-        menus: list[Menu],
-        session: AsyncSession = Depends(get_async_session)
-) -> list[dict[Any, Any]]:
+async def format_detailed_menus(menus: list[Menu]) -> list[dict[Any, Any]]:
     """
-    Форматирует объекты меню из списка выборки и связанные с ним подменю и блюда в json
+    Форматирует объекты меню из списка выборки и связанные с ним подменю и блюда в json. Подменю и блюда должны быть
+    загружены выборкой (select_all_menus_detail): форматирование не обращается к БД.
 
     :param menus: список меню
-    :param session: сессия подключения к БД
     :return: список со всеми отформатированными меню с отображением привязанных подменю и блюд
     """
     menus_json = []
 
     for menu in menus:
-        menus_json.append(await menu.json_detail())
+        menu_json = await menu.json_detail()
+        menu_json['submenus'] = await prepare_submenus_to_response(menu.submenus)
 
-    for menu in menus_json:
-        formatted_submenus = await prepare_submenus_to_response(menu['submenus'], session=session)
-        menu['submenus'] = formatted_submenus
+        menus_json.append(menu_json)
 
     return menus_json
@@ -2,7 +2,7 @@
 Модуль для описания класса модели БД.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 20 января 2024
+Дата: 16 октября 2026 | json() отдает UUID как есть, его сериализует orjson
 """
 
 import os
@@ -32,7 +32,7 @@ class Menu(Base):
 
     async def json_detail(self) -> dict[Any, Any]:
         return {
-            'id': str(self.id),
+            'id': self.id,
             'title': self.title,
             'description': self.description,
             'submenus': self.submenus
@@ -48,7 +48,7 @@ class Menu(Base):
 
         if hasattr(self, 'submenus_count') and hasattr(self, 'dishes_count'):
             return {
-                'id': str(self.id),
+                'id': self.id,
                 'title': self.title,
                 'description': self.description,
                 'submenus_count': self.submenus_count,
@@ -56,7 +56,7 @@ class Menu(Base):
             }
         else:
             return {
-                'id': str(self.id),
+                'id': self.id,
                 'title': self.title,
                 'description': self.description,
             }
@@ -3,28 +3,29 @@
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
 
-Дата: 10 февраля 2024 | Реализована инвалидация кэша для синхронизации с Google Sheets
+Дата: 17 октября 2026 | Сборка значения для кэша получает сессию аргументом
 """
 from typing import Any
 
+from config import SQL_JSON_RENDERING
 from custom_router import CustomAPIRouter
-from database.database import get_async_session
+from database.database import get_async_read_session, get_async_session
 from database.database_services import (
     delete_menu,
     insert_data,
     select_all_menus,
     select_all_menus_detail,
-    select_all_submenus,
+    select_all_menus_detail_json,
     select_specific_menu,
     update_menu,
 )
-from fastapi import BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
+from fastapi import Depends
+from serialization import ORJSONResponse
 from services import (
-    create_cache,
-    delete_cache_by_key,
-    delete_linked_menu_cache,
-    get_cache,
+    CacheInvalidation,
+    CacheRevalidation,
+    get_or_create_cache,
+    get_versioned_cache_key,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from utils import get_created_object_dict
@@ -38,64 +39,67 @@ router = CustomAPIRouter(prefix='/api/v1', tags=['Menu'])
 
 
 @router.get(path='/menus/detail')
-async def get_all_menus_detail(session: AsyncSession = Depends(get_async_session)) -> list[dict[Any, Any]]:
+async def get_all_menus_detail(
+    cache_revalidation: CacheRevalidation = Depends(),
+    session: AsyncSession = Depends(get_async_read_session),
+) -> list[dict[Any, Any]]:
     """
     Обработка GET запроса для вывода всех меню со всеми связанными подменю и со всеми связанными блюдами
 
+    :param cache_revalidation: кэш с поддержкой stale-while-revalidate
     :param session: сессия подключения к БД
     :return: список со всеми меню с отображением привязанных подменю и блюд
     """
 
-    cache = await get_cache(key='menus_detail')
+    cache_key = await get_versioned_cache_key('menus_detail')
 
-    if cache is not None:
-        return cache
+    async def build_menus_detail(session: AsyncSession) -> list[dict[Any, Any]] | bytes:
+        if SQL_JSON_RENDERING:
+            return await select_all_menus_detail_json(session=session)
 
-    menus = await select_all_menus_detail(session=session)
+        menus = await select_all_menus_detail(session=session)
 
-    menus_json = await format_detailed_menus(menus=menus, session=session)
-    await create_cache(key='menus_detail', value=menus_json)
+        return await format_detailed_menus(menus=menus)
 
-    return menus_json
+    return await cache_revalidation.get_or_create_cache(key=cache_key, build=build_menus_detail, session=session)
 
 
 @router.get(path='/menus', name='menu_base_url')
-async def menu_get_method(session: AsyncSession = Depends(get_async_session)) -> list[MenusGet]:
+async def menu_get_method(
+    cache_revalidation: CacheRevalidation = Depends(),
+    session: AsyncSession = Depends(get_async_read_session),
+) -> list[MenusGet]:
     """
     Функция для обработки get запроса для получения всех меню.
 
     Args:
+        cache_revalidation: кэш с поддержкой stale-while-revalidate
         session: сессия подключения к БД.
 
     Returns: список объектов найденных меню.
 
     """
 
-    cache = await get_cache(key='menus')
+    cache_key = await get_versioned_cache_key('menus')
 
-    if cache is not None:
-        return cache
-
-    menus = await select_all_menus(session=session)
-
-    await create_cache(key='menus', value=menus)
-
-    return menus
+    return await cache_revalidation.get_or_create_cache(key=cache_key, build=select_all_menus, session=session)
 
 
 @router.post(path='/menus')
 async def menu_post_method(
-    new_menu_data: MenuCreate, background_tasks: BackgroundTasks, session: AsyncSession = Depends(get_async_session)
-) -> JSONResponse:
+    new_menu_data: MenuCreate,
+    cache_invalidation: CacheInvalidation = Depends(),
+    session: AsyncSession = Depends(get_async_session),
+) -> ORJSONResponse:
     """
     Функция для обработки POST запроса.
 
     Args:
         new_menu_data: данные для создания новой записи в таблице menu;
-        background_tasks: Объект фоновых задач FastAPI.
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse.
+    Returns: ORJSONResponse.
 
     """
 
@@ -104,16 +108,15 @@ async def menu_post_method(
         data_dict=new_menu_data_dict, database_model=Menu, session=session
     )
 
-    background_tasks.add_task(delete_cache_by_key, 'menus')
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    cache_invalidation.invalidate_namespaces()
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content=created_menu, status_code=201)
+    return ORJSONResponse(content=created_menu, status_code=201)
 
 
 @router.get(path='/menus/{target_menu_id}')
 async def menu_get_specific_method(
-    target_menu_id: str, session: AsyncSession = Depends(get_async_session)
+    target_menu_id: str, session: AsyncSession = Depends(get_async_read_session)
 ) -> MenuSpecificGet:
     """
     Функция для обработки get запроса по указанному id.
@@ -126,43 +129,42 @@ async def menu_get_specific_method(
 
     """
 
-    cache = await get_cache(key=target_menu_id)
+    cache_key = await get_versioned_cache_key('menu', menu_id=target_menu_id)
 
-    if cache is not None:
-        return cache
+    async def build_menu() -> dict[str, str] | None:
+        menu_data = await select_specific_menu(
+            target_menu_id=target_menu_id, session=session
+        )
 
-    menu_data = await select_specific_menu(
-        target_menu_id=target_menu_id, session=session
-    )
+        menu = await parse_menu_data(menu_data=menu_data)
 
-    menu = await parse_menu_data(menu_data=menu_data)
+        return await menu.json() if menu else None
 
-    if not menu:
-        return JSONResponse(content={'detail': 'menu not found'}, status_code=404)
+    response = await get_or_create_cache(key=cache_key, build=build_menu)
 
-    menu_json = await menu.json()
-    await create_cache(key=target_menu_id, value=menu_json)
+    if response is None:
+        return ORJSONResponse(content={'detail': 'menu not found'}, status_code=404)
 
-    return menu
+    return response
 
 
 @router.patch('/menus/{target_menu_id}')
 async def menu_patch_method(
     target_menu_id: str,
     update_menu_data: MenuUpdate,
-    background_tasks: BackgroundTasks,
+    cache_invalidation: CacheInvalidation = Depends(),
     session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки запроса с методом PATCH.
 
     Args:
         target_menu_id: id записи, которую необходимо обновить
         update_menu_data: данные, на которые будут заменены текущие
-        background_tasks: Объект фоновых задач FastAPI.
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse, который содержит объект обновленной записи и статус код.
+    Returns: ORJSONResponse, который содержит объект обновленной записи и статус код.
 
     """
 
@@ -174,43 +176,36 @@ async def menu_patch_method(
 
     updated_menu_dict = get_created_object_dict(created_object=updated_menu)
 
-    background_tasks.add_task(delete_cache_by_key, 'menus')
-    background_tasks.add_task(delete_cache_by_key, target_menu_id)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    cache_invalidation.write_through(
+        fields={'title': updated_menu.title, 'description': updated_menu.description},
+        menu_id=target_menu_id,
+    )
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content=updated_menu_dict, status_code=200)
+    return ORJSONResponse(content=updated_menu_dict, status_code=200)
 
 
 @router.delete('/menus/{target_menu_id}')
 async def menu_delete_method(
-    target_menu_id: str, background_tasks: BackgroundTasks, session: AsyncSession = Depends(get_async_session)
-) -> JSONResponse:
+    target_menu_id: str,
+    cache_invalidation: CacheInvalidation = Depends(),
+    session: AsyncSession = Depends(get_async_session),
+) -> ORJSONResponse:
     """
     Функция для обработки запроса с методом DELETE.
 
     Args:
         target_menu_id: id записи, которую необходимо удалить
-        background_tasks: Объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse
+    Returns: ORJSONResponse
 
     """
-    submenus_for_menu = await select_all_submenus(session=session, target_menu_id=target_menu_id)
-
-    await delete_linked_menu_cache(
-        submenus_for_menu=submenus_for_menu,
-        target_menu_id=target_menu_id,
-        background_tasks=background_tasks,
-        session=session
-    )
-
     await delete_menu(target_menu_id=target_menu_id, session=session)
 
-    background_tasks.add_task(delete_cache_by_key, target_menu_id)
-    background_tasks.add_task(delete_cache_by_key, 'menus')
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
+    # Версия меню входит в ключи всех его подменю и блюд, поэтому они инвалидируются вместе с меню.
+    cache_invalidation.invalidate_namespaces(menu_id=target_menu_id)
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content={'status': 'success!'}, status_code=200)
+    return ORJSONResponse(content={'status': 'success!'}, status_code=200)
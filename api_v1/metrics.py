@@ -0,0 +1,121 @@
+"""
+Модуль метрик кэша и пула соединений с БД в формате Prometheus.
+
+Метрики размечаются семейством ключа и маршрутом, в рамках которого выполнена операция. Маршрут хранится в
+контекстной переменной: его устанавливает MetricsRoute перед вызовом обработчика, и он же доступен фоновым задачам
+запроса (пересборка stale-while-revalidate, инвалидация).
+
+Если задан PROMETHEUS_MULTIPROC_DIR, каждый воркер gunicorn пишет значения в файлы этого каталога, а /metrics
+суммирует их по всем воркерам.
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Метрики всех воркеров gunicorn
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config import PROMETHEUS_MULTIPROC_DIR
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Вне обработчиков запросов (синхронизация с Google Sheets, очистка кэша при запуске) маршрута нет.
+current_route: ContextVar[str] = ContextVar('current_route', default='none')
+
+CACHE_LABELS = ['family', 'route']
+
+cache_hits = Counter(
+    'menu_app_cache_hits_total',
+    'Попадания в кэш. level: l1 - кэш процесса, l2 - Redis, stale - устаревшее значение stale-while-revalidate',
+    [*CACHE_LABELS, 'level'],
+)
+cache_misses = Counter('menu_app_cache_misses_total', 'Промахи мимо L1 и Redis', CACHE_LABELS)
+cache_sets = Counter('menu_app_cache_sets_total', 'Записи значений в кэш', CACHE_LABELS)
+cache_invalidations = Counter(
+    'menu_app_cache_invalidations_total',
+    'Удаленные ключи и увеличенные счетчики версий (family version)',
+    CACHE_LABELS,
+)
+cache_latency = Histogram(
+    'menu_app_cache_operation_seconds',
+    'Длительность операций кэша. operation: get - чтение, build - сборка значения из БД и запись, '
+    'invalidate - инвалидация',
+    [*CACHE_LABELS, 'operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+db_pool_checkout_latency = Histogram(
+    'menu_app_db_pool_checkout_seconds',
+    'Ожидание соединения из пула SQLAlchemy',
+    ['pool'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+# У каждого воркера свой пул: выданные соединения суммируются по живым воркерам, заполненность - наибольшая из них.
+db_pool_checked_out = Gauge(
+    'menu_app_db_pool_checked_out', 'Соединения, выданные из пула', ['pool'], multiprocess_mode='livesum'
+)
+db_pool_saturation = Gauge(
+    'menu_app_db_pool_saturation',
+    'Доля выданных соединений от максимального размера пула (pool_size + max_overflow)',
+    ['pool'],
+    multiprocess_mode='livemax',
+)
+
+
+@contextmanager
+def observe_latency(operation: str, family: str) -> Iterator[None]:
+    """
+    Измеряет длительность блока и записывает ее в гистограмму cache_latency.
+
+    :param operation: название операции
+    :param family: семейство ключа
+    :return: None
+    """
+
+    started_at = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        cache_latency.labels(family=family, route=current_route.get(), operation=operation).observe(
+            time.perf_counter() - started_at
+        )
+
+
+def count(counter: Counter, family: str, amount: int = 1, **labels: str) -> None:
+    """
+    Увеличивает счетчик с метками семейства и текущего маршрута.
+
+    :param counter: счетчик
+    :param family: семейство ключа
+    :param amount: на сколько увеличить
+    :param labels: дополнительные метки
+    :return: None
+    """
+
+    counter.labels(family=family, route=current_route.get(), **labels).inc(amount)
+
+
+def generate_metrics() -> bytes:
+    """
+    Формирует метрики в текстовом формате Prometheus. Если задан PROMETHEUS_MULTIPROC_DIR, метрики собираются из
+    файлов всех воркеров, иначе отдаются метрики текущего процесса.
+
+    :return: метрики в текстовом формате Prometheus
+    """
+
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest()
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+
+    return generate_latest(registry)
@@ -0,0 +1,46 @@
+"""
+Модуль для сохранения read-your-writes при чтении через реплику.
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026
+"""
+
+import math
+
+from config import DB_READ_YOUR_WRITES_WINDOW
+from database.database import READ_PRIMARY_COOKIE, route_reads_to_primary
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadYourWritesMiddleware:
+    """
+    После успешного изменяющего запроса (POST, PATCH, DELETE) ставит клиенту cookie, с которым его чтения идут через
+    основную БД в течение DB_READ_YOUR_WRITES_WINDOW секунд, и направляет в основную БД чтения этого процесса.
+    Остальные процессы узнают о записи из сообщения об инвалидации кэша.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                route_reads_to_primary()
+
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    'set-cookie',
+                    f'{READ_PRIMARY_COOKIE}=1; Max-Age={math.ceil(DB_READ_YOUR_WRITES_WINDOW)}; Path=/; HttpOnly; '
+                    f'SameSite=Lax',
+                )
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,100 @@
+"""
+Модуль для сжатия больших значений кэша перед записью в Redis.
+
+Сжатое значение начинается с байта-заголовка кодека. Строка JSON не может начинаться с этого байта, поэтому значения
+без заголовка (несжатые, счетчики версий, записанные до включения сжатия) читаются как есть.
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 16 октября 2026
+"""
+
+import time
+from typing import Any
+
+import zstandard
+from config import CACHE_COMPRESSION_LEVEL, CACHE_COMPRESSION_THRESHOLD
+
+ZSTD_HEADER = b'\x01'
+
+
+class CompressionStats:
+    """Счетчики объема и времени сжатия значений кэша в текущем процессе."""
+
+    def __init__(self):
+        self.counters: dict[str, float] = {
+            'compressed_values': 0,
+            'raw_bytes': 0,
+            'compressed_bytes': 0,
+            'compress_seconds': 0.0,
+            'decompressed_values': 0,
+            'decompress_seconds': 0.0,
+        }
+
+    def json(self) -> dict[str, Any]:
+        """
+        Формирует словарь со счетчиками и средней степенью сжатия.
+
+        :return: словарь со статистикой
+        """
+
+        return {
+            **self.counters,
+            'compression_ratio': (
+                self.counters['raw_bytes'] / self.counters['compressed_bytes']
+                if self.counters['compressed_bytes'] else 0.0
+            ),
+        }
+
+
+compression_stats = CompressionStats()
+
+compressor = zstandard.ZstdCompressor(level=CACHE_COMPRESSION_LEVEL)
+decompressor = zstandard.ZstdDecompressor()
+
+
+def compress_value(value: bytes) -> bytes:
+    """
+    Функция сжимает значение, если его размер не меньше CACHE_COMPRESSION_THRESHOLD (0 - сжатие выключено).
+
+    Args:
+        value: строка JSON в байтах
+
+    Returns:
+        Сжатое значение с заголовком кодека или исходное значение
+    """
+
+    if not CACHE_COMPRESSION_THRESHOLD or len(value) < CACHE_COMPRESSION_THRESHOLD:
+        return value
+
+    started_at = time.perf_counter()
+    compressed_value = ZSTD_HEADER + compressor.compress(value)
+
+    compression_stats.counters['compress_seconds'] += time.perf_counter() - started_at
+    compression_stats.counters['compressed_values'] += 1
+    compression_stats.counters['raw_bytes'] += len(value)
+    compression_stats.counters['compressed_bytes'] += len(compressed_value)
+
+    return compressed_value
+
+
+def decompress_value(value: bytes | None) -> bytes | None:
+    """
+    Функция распаковывает значение, если оно начинается с заголовка кодека.
+
+    Args:
+        value: значение из Redis
+
+    Returns:
+        Строка JSON в байтах или None, если значения нет
+    """
+
+    if not value or value[:1] != ZSTD_HEADER:
+        return value
+
+    started_at = time.perf_counter()
+    decompressed_value = decompressor.decompress(value[1:])
+
+    compression_stats.counters['decompress_seconds'] += time.perf_counter() - started_at
+    compression_stats.counters['decompressed_values'] += 1
+
+    return decompressed_value
@@ -0,0 +1,124 @@
+"""
+Модуль для реализации кэша в памяти процесса (L1), который стоит перед Redis (L2).
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 16 октября 2026
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+from config import CACHE_LOCAL_MAXSIZE, CACHE_LOCAL_TTL
+
+
+class LocalCache:
+    """
+    LRU кэш с ограниченным размером и временем жизни записей.
+
+    Кэш включается только пока процесс подписан на канал инвалидации Redis, иначе изменения, сделанные другими
+    воркерами, до него не дойдут.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = False
+        self.data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """
+        Метод для получения значения по ключу.
+
+        Args:
+            key: ключ
+
+        Returns:
+            Значение, если оно есть в кэше и не устарело, иначе None
+        """
+
+        if not self.enabled:
+            return None
+
+        item = self.data.get(key)
+
+        if item is None:
+            return None
+
+        expires_at, value = item
+
+        if expires_at < time.monotonic():
+            del self.data[key]
+            return None
+
+        self.data.move_to_end(key)
+
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Метод для сохранения значения. При превышении размера вытесняется самая давно используемая запись.
+
+        Args:
+            key: ключ
+            value: значение
+
+        Returns:
+            None
+        """
+
+        if not self.enabled:
+            return
+
+        self.data[key] = (time.monotonic() + self.ttl, value)
+        self.data.move_to_end(key)
+
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        """
+        Метод для удаления значений по ключам.
+
+        Args:
+            keys: ключи
+
+        Returns:
+            None
+        """
+
+        for key in keys:
+            self.data.pop(key, None)
+
+    def clear(self) -> None:
+        self.data.clear()
+
+
+class CacheStats:
+    """Счетчики попаданий и промахов для каждого уровня кэша."""
+
+    def __init__(self):
+        self.counters = {'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0}
+
+    def increment(self, counter: str) -> None:
+        self.counters[counter] += 1
+
+    def json(self) -> dict[str, Any]:
+        """
+        Формирует словарь со счетчиками и долей попаданий для каждого уровня.
+
+        :return: словарь со статистикой
+        """
+
+        l1_requests = self.counters['l1_hits'] + self.counters['l1_misses']
+        l2_requests = self.counters['l2_hits'] + self.counters['l2_misses']
+
+        return {
+            **self.counters,
+            'l1_hit_ratio': self.counters['l1_hits'] / l1_requests if l1_requests else 0.0,
+            'l2_hit_ratio': self.counters['l2_hits'] / l2_requests if l2_requests else 0.0,
+        }
+
+
+local_cache = LocalCache(maxsize=CACHE_LOCAL_MAXSIZE, ttl=CACHE_LOCAL_TTL)
+cache_stats = CacheStats()
@@ -2,56 +2,259 @@
 Модуль для реализации подключения к Redis и выполнения операций в БД.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 10 февраля 2024 | Реализован метод инвалидации всего кэша
+Дата: 17 октября 2026 | Хэш предыдущей версии меню удаляется в том же pipeline
 """
 
-import json
+import asyncio
+import random
+import time
+from collections.abc import AsyncGenerator, Callable
 from typing import Any
 
 import aioredis
-from config import IS_TEST, REDIS_HOST, TEST_REDIS_HOST
+from config import (
+    CACHE_KEY_PREFIX,
+    CACHE_PURGE_BATCH_SIZE,
+    CACHE_WRITE_THROUGH_RETRIES,
+    CACHE_WRITE_THROUGH_RETRY_BACKOFF,
+    IS_TEST,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    TEST_REDIS_HOST,
+)
+from redis_tools.compression import compress_value, decompress_value
+from serialization import dumps, loads, make_etag
 from utils import format_object_to_json
 
+# Удаляет блокировку, только если она все еще принадлежит владельцу токена.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Значение с ETag: заголовок, ETag фиксированной длины, затем значение (возможно, сжатое). Строка JSON, сжатое
+# значение и счетчик не начинаются с этого байта, поэтому значения без ETag читаются как есть.
+ETAG_HEADER = b'\x02'
+ETAG_LENGTH = 32
+
+# Разделитель ключа Redis и поля хэша в ключе кэша: значение ключа <хэш>|<поле> хранится в поле хэша.
+HASH_FIELD_SEPARATOR = '|'
+
+# Записывает поле хэша и задает время жизни хэша, если оно еще не задано: хэш живет с момента записи первого поля,
+# поэтому поля, записанные под устаревшими версиями, удаляются вместе с ним (в Redis 6 нет EXPIRE NX).
+SET_HASH_FIELD_SCRIPT = """
+redis.call('hset', KEYS[1], ARGV[1], ARGV[2])
+if tonumber(ARGV[3]) > 0 and redis.call('ttl', KEYS[1]) == -1 then
+    redis.call('expire', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+# Увеличивает счетчик версий и удаляет ключ с данными предыдущей версии (<ARGV[1]><версия - 1>) без второго сетевого
+# запроса. Ключ с данными зависит от новой версии, поэтому формируется в скрипте.
+INCREMENT_AND_UNLINK_PREVIOUS_SCRIPT = """
+local version = redis.call('incr', KEYS[1])
+redis.call('unlink', ARGV[1] .. (version - 1))
+return version
+"""
+
+connection_pool: aioredis.ConnectionPool | None = None
+connection_pool_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_connection_pool() -> aioredis.ConnectionPool:
+    """
+    Возвращает общий для процесса пул соединений с Redis, создавая его при первом обращении.
+
+    Пул создается в lifespan приложения, но процессы без lifespan (синхронизация с Google Sheets) получают его лениво.
+    Соединения привязаны к event loop, поэтому при смене цикла (например, в тестах) пул создается заново.
+
+    :return: пул соединений Redis
+    """
+    global connection_pool, connection_pool_loop
+
+    loop = asyncio.get_running_loop()
+
+    if connection_pool is None or connection_pool_loop is not loop:
+        connection_pool_loop = loop
+        host = TEST_REDIS_HOST if IS_TEST else REDIS_HOST
+        connection_pool = aioredis.ConnectionPool.from_url(
+            f'redis://{host}:6379/0',
+            max_connections=REDIS_MAX_CONNECTIONS,
+        )
+
+    return connection_pool
+
+
+async def close_connection_pool() -> None:
+    """
+    Закрывает все соединения пула. Вызывается при остановке приложения.
+
+    :return: None
+    """
+    global connection_pool, connection_pool_loop
+
+    if connection_pool is not None:
+        await connection_pool.disconnect()
+        connection_pool = None
+        connection_pool_loop = None
+
+
+def split_key(key: str) -> tuple[str, str | None]:
+    """
+    Разбирает ключ кэша на ключ Redis и поле хэша.
+
+    :param key: ключ кэша без префикса приложения
+    :return: ключ Redis и поле хэша (None, если значение хранится строкой)
+    """
+
+    redis_key, separator, field = key.partition(HASH_FIELD_SEPARATOR)
+
+    return redis_key, field if separator else None
+
+
+def group_keys(keys: list[str]) -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Разделяет ключи кэша на ключи строк и поля хэшей, сгруппированные по хэшам, чтобы обработать каждый хэш одной
+    командой.
+
+    :param keys: ключи кэша без префикса приложения
+    :return: ключи строк и словарь ключ хэша: список полей
+    """
+
+    string_keys = []
+    hash_fields: dict[str, list[str]] = {}
+
+    for key in keys:
+        redis_key, field = split_key(key)
+
+        if field is None:
+            string_keys.append(key)
+        else:
+            hash_fields.setdefault(redis_key, []).append(field)
+
+    return string_keys, hash_fields
+
+
+def pack_value(value: bytes) -> bytes:
+    """
+    Подготавливает строку JSON к записи в Redis: сжимает ее и добавляет ETag содержимого, чтобы его не вычислять при
+    каждом чтении.
+
+    :param value: строка JSON в байтах
+    :return: значение для записи в Redis
+    """
+
+    return ETAG_HEADER + make_etag(value).encode() + compress_value(value)
+
+
+def unpack_value(value: bytes | None) -> tuple[bytes | None, str | None]:
+    """
+    Разбирает значение из Redis на строку JSON и ETag.
+
+    :param value: значение из Redis
+    :return: строка JSON в байтах (или None) и ETag (None, если значение записано без него)
+    """
+
+    if not value or value[:1] != ETAG_HEADER:
+        return decompress_value(value), None
+
+    etag_end = len(ETAG_HEADER) + ETAG_LENGTH
+
+    return decompress_value(value[etag_end:]), value[len(ETAG_HEADER):etag_end].decode()
+
 
 class RedisTools:
-    def __init__(self):
-        self.redis = None
+    def __init__(self, key_prefix: str = CACHE_KEY_PREFIX):
+        self.redis: aioredis.Redis | None = None
+        self.key_prefix = key_prefix
+
+    def make_key(self, key: str) -> str:
+        """
+        Метод для добавления префикса приложения к ключу или названию канала.
+
+        Args:
+            key: ключ без префикса
+
+        Returns:
+            Ключ с префиксом
+        """
+
+        return self.key_prefix + key
+
+    def queue_set(self, pipe: aioredis.client.Pipeline, key: str, value: bytes, ttl: int | None) -> None:
+        """
+        Метод для добавления в pipeline записи значения: SET для строки, HSET для поля хэша. Время жизни поля хэша -
+        это время жизни хэша, оно задается при записи первого поля.
+
+        Args:
+            pipe: pipeline
+            key: ключ кэша
+            value: значение для записи в Redis
+            ttl: время жизни ключа в секундах, None - без ограничения
+
+        Returns:
+            None
+        """
+
+        redis_key, field = split_key(key)
+
+        if field is None:
+            pipe.set(self.make_key(redis_key), value, ex=ttl)
+        else:
+            pipe.eval(SET_HASH_FIELD_SCRIPT, 1, self.make_key(redis_key), field, value, ttl or 0)
 
     async def connect_redis(self) -> aioredis.Redis:
         """
-        Метод для создания подключения к Redis.
+        Метод для получения клиента Redis, работающего поверх общего пула соединений.
 
         Returns:
             Объект клиента Redis.
         """
 
-        host = TEST_REDIS_HOST if IS_TEST else REDIS_HOST
+        pool = get_connection_pool()
 
-        if not self.redis:
-            self.redis = await aioredis.from_url(f'redis://{host}:6379/0')
+        if not self.redis or self.redis.connection_pool is not pool:
+            self.redis = aioredis.Redis(connection_pool=pool)
         return self.redis
 
-    async def set_pair(self, key: str, value: list[Any] | dict[Any, Any]) -> None:
+    async def prepare_value(self, value: list[Any] | dict[Any, Any] | bytes) -> bytes:
         """
-        Метод для сохранения объекта/объектов в кэше.
+        Метод для приведения объекта/объектов к строке JSON. Уже готовая строка JSON (например, собранная Postgres)
+        возвращается как есть.
 
         Args:
-            key: ключ, по которому можно получить доступ к значению объекта/объектов
-            value: значение объекта/объектов
+            value: значение объекта/объектов или строка JSON в байтах
 
         Returns:
-            None
+            Строка JSON в байтах
         """
 
-        redis = await self.connect_redis()
+        if isinstance(value, bytes):
+            return value
 
         try:
-            json_value = json.dumps(value)
+            return dumps(value)
         except TypeError:
             list_with_formatted_objects = await format_object_to_json(value)
-            json_value = json.dumps(list_with_formatted_objects)
+            return dumps(list_with_formatted_objects)
 
-        await redis.set(key, json_value)
+    async def set_pair(self, key: str, value: list[Any] | dict[Any, Any], ttl: int | None = None) -> None:
+        """
+        Метод для сохранения объекта/объектов в кэше.
+
+        Args:
+            key: ключ, по которому можно получить доступ к значению объекта/объектов
+            value: значение объекта/объектов
+            ttl: время жизни ключа в секундах, None - без ограничения
+
+        Returns:
+            None
+        """
+
+        await self.set_raw_pairs(pairs={key: await self.prepare_value(value)}, ttl=ttl)
 
     async def get_pair(self, key: str) -> list[dict[Any, Any]] | dict[Any, Any] | None:
         """
@@ -64,17 +267,313 @@ class RedisTools:
             Если по указанному ключу найдено значение, то list, иначе None
         """
 
-        redis = await self.connect_redis()
-
-        cache = await redis.get(key)
+        cache = await self.get_raw_pair(key=key)
 
         if cache:
-            cache_list = json.loads(cache)
+            cache_list = loads(cache)
 
             return cache_list
 
         return None
 
+    async def get_raw_pair(self, key: str) -> bytes | None:
+        """
+        Метод для получения значения по ключу без десериализации: строка JSON в том виде, в котором она отдается
+        клиенту.
+
+        Args:
+            key: ключ, по которому должно хранится значение
+
+        Returns:
+            Строка JSON в байтах, если значение найдено, иначе None
+        """
+
+        cache, _ = await self.get_raw_pair_with_etag(key=key)
+
+        return cache
+
+    async def get_raw_pair_with_etag(self, key: str) -> tuple[bytes | None, str | None]:
+        """
+        Метод для получения значения по ключу без десериализации вместе с его ETag.
+
+        Args:
+            key: ключ, по которому должно хранится значение
+
+        Returns:
+            Строка JSON в байтах (или None) и ETag (None, если значения нет или оно записано без ETag)
+        """
+
+        redis = await self.connect_redis()
+        redis_key, field = split_key(key)
+
+        if field is None:
+            return unpack_value(await redis.get(self.make_key(redis_key)))
+
+        return unpack_value(await redis.hget(self.make_key(redis_key), field))
+
+    async def set_pairs(self, pairs: dict[str, list[Any] | dict[Any, Any]], ttl: int | None = None) -> None:
+        """
+        Метод для сохранения нескольких значений за один сетевой запрос (pipeline).
+
+        Args:
+            pairs: словарь ключ: значение
+            ttl: время жизни ключей в секундах, None - без ограничения
+
+        Returns:
+            None
+        """
+
+        await self.set_raw_pairs(
+            pairs={key: await self.prepare_value(value) for key, value in pairs.items()},
+            ttl=ttl
+        )
+
+    async def set_raw_pairs(
+            self,
+            pairs: dict[str, bytes],
+            ttl: int | None | dict[str, int | None] = None,
+    ) -> None:
+        """
+        Метод для сохранения нескольких уже сериализованных значений за один сетевой запрос (pipeline).
+
+        Args:
+            pairs: словарь ключ: строка JSON
+            ttl: время жизни ключей в секундах (общее или словарь ключ: время жизни), None - без ограничения
+
+        Returns:
+            None
+        """
+
+        if not pairs:
+            return
+
+        redis = await self.connect_redis()
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, value in pairs.items():
+                key_ttl = ttl.get(key) if isinstance(ttl, dict) else ttl
+                self.queue_set(pipe=pipe, key=key, value=pack_value(value), ttl=key_ttl)
+
+            await pipe.execute()
+
+    async def set_raw_pairs_if_unchanged(
+            self,
+            pairs: dict[str, bytes],
+            ttl: int | None | dict[str, int | None],
+            watch_key: str,
+            watch_value: bytes | None,
+    ) -> bool:
+        """
+        Метод для сохранения нескольких уже сериализованных значений одной транзакцией, только если значение
+        watch_key все еще равно watch_value (WATCH/MULTI).
+
+        Args:
+            pairs: словарь ключ: строка JSON
+            ttl: время жизни ключей в секундах (общее или словарь ключ: время жизни), None - без ограничения
+            watch_key: ключ, изменение которого отменяет запись
+            watch_value: ожидаемое значение watch_key
+
+        Returns:
+            True, если значения сохранены
+        """
+
+        redis = await self.connect_redis()
+        redis_watch_key = self.make_key(watch_key)
+
+        async with redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(redis_watch_key)
+
+                if await pipe.get(redis_watch_key) != watch_value:
+                    return False
+
+                pipe.multi()
+
+                for key, value in pairs.items():
+                    key_ttl = ttl.get(key) if isinstance(ttl, dict) else ttl
+                    self.queue_set(pipe=pipe, key=key, value=pack_value(value), ttl=key_ttl)
+
+                await pipe.execute()
+            except aioredis.WatchError:
+                return False
+
+        return True
+
+    async def patch_pairs(self, keys: list[str], patch: Callable[[bytes], bytes]) -> tuple[list[str], bool]:
+        """
+        Метод для изменения значений на месте с сохранением оставшегося времени жизни ключей. Поля одного хэша
+        читаются и записываются одной транзакцией WATCH/MULTI, чтобы изменения полей не прерывали друг друга.
+        Прерванная транзакция повторяется не более CACHE_WRITE_THROUGH_RETRIES раз с нарастающей паузой.
+
+        Args:
+            keys: ключи кэша без префикса приложения
+            patch: функция, которая получает строку JSON и возвращает новую
+
+        Returns:
+            Обновленные ключи (отсутствующие в кэше пропускаются) и False, если какой-то ключ Redis не удалось
+            обновить за отведенные попытки
+        """
+
+        string_keys, hash_fields = group_keys(keys)
+        redis_keys: list[tuple[str, list[str] | None]] = [
+            *((key, None) for key in string_keys),
+            *hash_fields.items(),
+        ]
+
+        results = await asyncio.gather(
+            *(self.patch_redis_key(redis_key=redis_key, fields=fields, patch=patch) for redis_key, fields in redis_keys)
+        )
+
+        patched_keys = [key for patched in results for key in patched or []]
+
+        return patched_keys, None not in results
+
+    async def patch_redis_key(
+            self,
+            redis_key: str,
+            fields: list[str] | None,
+            patch: Callable[[bytes], bytes],
+    ) -> list[str] | None:
+        """
+        Метод для изменения на месте строки или полей одного хэша в транзакции WATCH/MULTI.
+
+        Args:
+            redis_key: ключ Redis без префикса приложения
+            fields: поля хэша или None, если значение хранится строкой
+            patch: функция, которая получает строку JSON и возвращает новую
+
+        Returns:
+            Обновленные ключи кэша, пустой список, если значений нет в кэше, или None, если ключ изменяли во время
+            всех попыток
+        """
+
+        redis = await self.connect_redis()
+        prefixed_key = self.make_key(redis_key)
+
+        async with redis.pipeline(transaction=True) as pipe:
+            for attempt in range(CACHE_WRITE_THROUGH_RETRIES + 1):
+                try:
+                    await pipe.watch(prefixed_key)
+
+                    if fields is None:
+                        value, _ = unpack_value(await pipe.get(prefixed_key))
+
+                        if value is None:
+                            return []
+
+                        pipe.multi()
+                        pipe.set(prefixed_key, pack_value(patch(value)), keepttl=True)
+                        await pipe.execute()
+
+                        return [redis_key]
+
+                    values = await pipe.hmget(prefixed_key, fields)
+
+                    patched: dict[str, bytes] = {}
+
+                    for field, (value, _) in zip(fields, map(unpack_value, values)):
+                        if value is not None:
+                            patched[field] = pack_value(patch(value))
+
+                    if not patched:
+                        return []
+
+                    # Поле хэша не имеет своего времени жизни: HSET не меняет время жизни хэша.
+                    pipe.multi()
+                    pipe.hset(prefixed_key, mapping=patched)
+                    await pipe.execute()
+
+                    return [redis_key + HASH_FIELD_SEPARATOR + field for field in patched]
+                except aioredis.WatchError:
+                    if attempt < CACHE_WRITE_THROUGH_RETRIES:
+                        await asyncio.sleep(random.uniform(0, CACHE_WRITE_THROUGH_RETRY_BACKOFF * 2 ** attempt))
+
+        return None
+
+    async def increment(self, key: str) -> int:
+        """
+        Метод для увеличения счетчика на единицу.
+
+        Args:
+            key: ключ счетчика
+
+        Returns:
+            Новое значение счетчика
+        """
+
+        redis = await self.connect_redis()
+
+        return await redis.incr(self.make_key(key))
+
+    async def get_stale_pair(
+            self,
+            key: str,
+            since_key: str,
+            since_ttl: int,
+    ) -> tuple[bytes | None, float]:
+        """
+        Метод для получения устаревшего значения (без десериализации) вместе со временем, с которого оно считается
+        устаревшим.
+        Время фиксируется в since_key при первом вызове и не меняется при последующих.
+
+        Args:
+            key: ключ, по которому хранится устаревшее значение
+            since_key: ключ, в котором хранится время начала устаревания
+            since_ttl: время жизни since_key в секундах
+
+        Returns:
+            Строка JSON в байтах (или None) и время начала устаревания (unix time)
+        """
+
+        redis = await self.connect_redis()
+
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(self.make_key(key))
+            pipe.set(self.make_key(since_key), time.time(), ex=since_ttl, nx=True)
+            pipe.get(self.make_key(since_key))
+
+            cache, _, stale_since = await pipe.execute()
+
+        return unpack_value(cache)[0], float(stale_since)
+
+    async def get_pairs(self, keys: list[str]) -> list[list[dict[Any, Any]] | dict[Any, Any] | None]:
+        """
+        Метод для получения значений нескольких ключей за один сетевой запрос: строки читаются одной командой MGET,
+        поля каждого хэша - одной командой HMGET.
+
+        Args:
+            keys: список ключей
+
+        Returns:
+            Список значений в порядке переданных ключей. Для отсутствующих ключей - None
+        """
+
+        if not keys:
+            return []
+
+        redis = await self.connect_redis()
+
+        string_keys, hash_fields = group_keys(keys)
+
+        async with redis.pipeline(transaction=False) as pipe:
+            if string_keys:
+                pipe.mget([self.make_key(key) for key in string_keys])
+
+            for redis_key, fields in hash_fields.items():
+                pipe.hmget(self.make_key(redis_key), fields)
+
+            results = await pipe.execute()
+
+        cache_by_key = dict(zip(string_keys, results.pop(0))) if string_keys else {}
+
+        for (redis_key, fields), cache_list in zip(hash_fields.items(), results):
+            for field, cache in zip(fields, cache_list):
+                cache_by_key[redis_key + HASH_FIELD_SEPARATOR + field] = cache
+
+        values = [unpack_value(cache_by_key[key])[0] for key in keys]
+
+        return [loads(value) if value else None for value in values]
+
     async def invalidate_cache(self, key: str) -> None:
         """
         Метод для инвалидации кэша в случае изменения/добавления/удаления записи.
@@ -87,14 +586,196 @@ class RedisTools:
         """
         redis = await self.connect_redis()
 
-        await redis.delete(key)
+        await redis.unlink(self.make_key(key))
+
+    async def invalidate_cache_many(
+            self,
+            keys: list[str],
+            counters: list[str] | None = None,
+            notify_channel: str | None = None,
+            notify_keys: list[str] | None = None,
+            versioned_key_prefixes: dict[str, str] | None = None,
+    ) -> dict[str, int]:
+        """
+        Метод для инвалидации нескольких ключей за один сетевой запрос (pipeline).
+
+        Ключи удаляются неблокирующей командой UNLINK, поля хэшей - командой HDEL, счетчики версий увеличиваются
+        командой INCR.
+
+        Args:
+            keys: ключи, по которым нужно инвалидировать кэш
+            counters: ключи счетчиков версий, которые нужно увеличить
+            notify_channel: канал pub/sub, в который публикуется список удаленных ключей и измененных счетчиков
+            notify_keys: ключи, которые не удаляются, но публикуются в канал (например, обновленные на месте)
+            versioned_key_prefixes: счетчик: префикс ключа, который хранит данные версии счетчика (<префикс><версия>).
+                Вместе с увеличением счетчика удаляется ключ предыдущей версии
 
-    async def invalidate_all_cache(self) -> None:
+        Returns:
+            Новые значения счетчиков: ключ счетчика: значение
+        """
+
+        counters = counters or []
+        notify_keys = notify_keys or []
+        versioned_key_prefixes = versioned_key_prefixes or {}
+
+        if not keys and not counters and not notify_keys:
+            return {}
+
+        redis = await self.connect_redis()
+
+        string_keys, hash_fields = group_keys(keys)
+
+        async with redis.pipeline(transaction=False) as pipe:
+            if string_keys:
+                pipe.unlink(*[self.make_key(key) for key in string_keys])
+
+            for redis_key, fields in hash_fields.items():
+                pipe.hdel(self.make_key(redis_key), *fields)
+
+            for counter in counters:
+                if counter in versioned_key_prefixes:
+                    pipe.eval(
+                        INCREMENT_AND_UNLINK_PREVIOUS_SCRIPT,
+                        1,
+                        self.make_key(counter),
+                        self.make_key(versioned_key_prefixes[counter]),
+                    )
+                else:
+                    pipe.incr(self.make_key(counter))
+
+            if notify_channel:
+                pipe.publish(self.make_key(notify_channel), dumps(keys + counters + notify_keys))
+
+            results = await pipe.execute()
+
+        counters_start = (1 if string_keys else 0) + len(hash_fields)
+
+        return dict(zip(counters, results[counters_start:counters_start + len(counters)]))
+
+    async def invalidate_all_cache(self, keep_prefix: str | None = None, notify_channel: str | None = None) -> None:
         """
         Метод для инвалидации кэша в случае необходимости очистки всего кэша.
 
+        Удаляются только ключи приложения (с префиксом key_prefix): порциями по CACHE_PURGE_BATCH_SIZE ключей
+        командами SCAN и UNLINK. В отличие от FLUSHALL Redis не блокируется, а данные других приложений
+        не затрагиваются.
+
+        :param keep_prefix: ключи, начинающиеся с этого префикса (без префикса приложения), не удаляются
+        :param notify_channel: канал pub/sub, в который публикуется сообщение об очистке всего кэша
         :return: None
         """
         redis = await self.connect_redis()
 
-        await redis.flushall()
+        keep_key_prefix = self.make_key(keep_prefix).encode() if keep_prefix else None
+        cursor = 0
+
+        while True:
+            cursor, keys = await redis.scan(
+                cursor=cursor,
+                match=self.make_key('*'),
+                count=CACHE_PURGE_BATCH_SIZE
+            )
+
+            if keep_key_prefix:
+                keys = [key for key in keys if not key.startswith(keep_key_prefix)]
+
+            if keys:
+                await redis.unlink(*keys)
+
+            if cursor == 0:
+                break
+
+        if notify_channel:
+            await redis.publish(self.make_key(notify_channel), dumps('*'))
+
+    async def scan_memory_usage(self) -> AsyncGenerator[tuple[str, int], None]:
+        """
+        Метод для перебора ключей приложения вместе с занимаемой ими памятью. Ключи перебираются порциями по
+        CACHE_PURGE_BATCH_SIZE командой SCAN, память каждой порции запрашивается одним pipeline (MEMORY USAGE).
+
+        :return: асинхронный генератор пар (ключ без префикса приложения, размер в байтах)
+        """
+        redis = await self.connect_redis()
+
+        cursor = 0
+
+        while True:
+            cursor, keys = await redis.scan(
+                cursor=cursor,
+                match=self.make_key('*'),
+                count=CACHE_PURGE_BATCH_SIZE
+            )
+
+            if keys:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.memory_usage(key)
+
+                    memory_usages = await pipe.execute()
+
+                for key, memory_usage in zip(keys, memory_usages):
+                    # Ключ мог истечь между SCAN и MEMORY USAGE.
+                    if memory_usage is not None:
+                        yield key.decode()[len(self.key_prefix):], memory_usage
+
+            if cursor == 0:
+                break
+
+    async def acquire_lock(self, key: str, token: str, timeout: float) -> bool:
+        """
+        Метод для захвата блокировки. Блокировка снимается автоматически по истечении timeout.
+
+        :param key: ключ блокировки
+        :param token: уникальный токен владельца блокировки
+        :param timeout: время жизни блокировки в секундах
+        :return: True, если блокировка захвачена
+        """
+        redis = await self.connect_redis()
+
+        return bool(await redis.set(self.make_key(key), token, px=int(timeout * 1000), nx=True))
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """
+        Метод для снятия блокировки, захваченной владельцем токена.
+
+        :param key: ключ блокировки
+        :param token: токен, с которым блокировка была захвачена
+        :return: None
+        """
+        redis = await self.connect_redis()
+
+        await redis.eval(RELEASE_LOCK_SCRIPT, 1, self.make_key(key), token)
+
+    async def listen_channel(
+            self,
+            channel: str,
+            on_subscribe: Callable[[], None],
+            on_message: Callable[[Any], None],
+    ) -> None:
+        """
+        Метод для подписки на канал pub/sub. Работает, пока соединение не будет разорвано.
+
+        Args:
+            channel: название канала
+            on_subscribe: вызывается после успешной подписки
+            on_message: вызывается для каждого сообщения с уже десериализованными данными
+
+        Returns:
+            None
+        """
+
+        redis = await self.connect_redis()
+        pubsub = redis.pubsub()
+
+        try:
+            await pubsub.subscribe(self.make_key(channel))
+            on_subscribe()
+
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    on_message(loads(message['data']))
+        finally:
+            await pubsub.reset()
+
+
+redis_tools = RedisTools()
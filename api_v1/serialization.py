@@ -0,0 +1,81 @@
+"""
+Модуль сериализации JSON на основе orjson. Общий для кэша Redis и HTTP ответов приложения.
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Сериализация UUID asyncpg
+"""
+import hashlib
+import uuid
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def default(obj: Any) -> Any:
+    """
+    Функция для сериализации типов, которые orjson не поддерживает сам. orjson сериализует только uuid.UUID, а asyncpg
+    возвращает свой подкласс UUID, поэтому он приводится к строке здесь.
+
+    Args:
+        obj: объект
+
+    Returns:
+        Значение, которое orjson может сериализовать. Decimal (цены) отдается строкой, чтобы не терять точность.
+    """
+
+    if isinstance(obj, (Decimal, uuid.UUID)):
+        return str(obj)
+
+    raise TypeError
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Функция для сериализации значения в JSON.
+
+    Args:
+        value: значение
+
+    Returns:
+        Строка JSON в байтах
+    """
+
+    return orjson.dumps(value, default=default)
+
+
+def loads(value: bytes | str) -> Any:
+    """
+    Функция для десериализации JSON.
+
+    Args:
+        value: строка JSON
+
+    Returns:
+        Десериализованное значение
+    """
+
+    return orjson.loads(value)
+
+
+def make_etag(value: bytes) -> str:
+    """
+    Функция для вычисления строгого ETag по содержимому: одинаковые тела ответов получают одинаковый ETag в любом
+    воркере и после перезапуска Redis.
+
+    Args:
+        value: строка JSON в байтах
+
+    Returns:
+        Хэш содержимого (32 шестнадцатеричных символа) без кавычек
+    """
+
+    return hashlib.blake2b(value, digest_size=16).hexdigest()
+
+
+class ORJSONResponse(JSONResponse):
+    """Ответ, который сериализует тело через orjson. Используется приложением по умолчанию."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -2,49 +2,467 @@
 Бизнес логика, общая для приложений.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 10 февраля 2024 | Добавлена функция для инвалидации всего кэша
+Дата: 17 октября 2026 | Вытеснение из L1 не зависит от маршрутизации чтений
 """
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable
 from typing import Any
 
-from database.database import get_async_session
-from database.database_services import get_dishes_for_submenu
-from fastapi import BackgroundTasks, Depends
-from redis_tools.tools import RedisTools
+from config import (
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_LOCK_POLL_INTERVAL,
+    CACHE_LOCK_TIMEOUT,
+    CACHE_MEMORY_BUDGET,
+    CACHE_STALE_TTL,
+    CACHE_TTL,
+    CACHE_TTL_BY_FAMILY,
+    CACHE_TTL_JITTER,
+    CACHE_WRITE_THROUGH,
+)
+from database.database import get_read_session_maker, route_reads_to_primary
+from fastapi import BackgroundTasks, Response
+from metrics import (
+    cache_hits,
+    cache_invalidations,
+    cache_misses,
+    cache_sets,
+    count,
+    observe_latency,
+)
+from redis_tools.local_cache import cache_stats, local_cache
+from redis_tools.tools import HASH_FIELD_SEPARATOR, redis_tools, split_key
+from serialization import dumps, loads, make_etag
 from sqlalchemy.ext.asyncio import AsyncSession
-from submenu.models import Submenu
 
+VERSION_KEY_PREFIX = 'version:'
+LOCK_KEY_PREFIX = 'lock:'
+STALE_KEY_PREFIX = 'stale:'
+STALE_SINCE_KEY_PREFIX = 'stale_since:'
+# Все значения меню (меню, список подменю, подменю, блюда) хранятся в одном хэше tree:<menu_id>:v<версия меню>.
+MENU_TREE_FAMILY = 'tree'
+MENU_TREE_KEY_PREFIX = MENU_TREE_FAMILY + ':'
+MENU_VERSION_KEY_PREFIX = VERSION_KEY_PREFIX + 'menu:'
+# Счетчик обновлений кэша на месте. Значения, собранные из БД до его изменения, не сохраняются: они могли быть
+# прочитаны до фиксации изменения и перезаписали бы обновленные значения.
+WRITE_THROUGH_KEY = VERSION_KEY_PREFIX + 'write_through'
 
-async def get_cache(key: str) -> list[dict[Any, Any]] | dict[Any, Any]:
+# Пересборки кэша, выполняемые этим процессом в данный момент: ключ -> future с результатом.
+cache_rebuilds: dict[str, asyncio.Future] = {}
+
+
+async def get_cache(key: str) -> list[dict[Any, Any]] | dict[Any, Any] | None:
     """
-    Возвращает значение ключа из Redis
+    Возвращает десериализованное значение ключа из кэша
 
     :param key: ключ, по которому нужно получить значение
     :return:
     """
 
-    redis = RedisTools()
+    cache = await get_raw_cache(key=key)
+
+    return loads(cache) if cache is not None else None
 
-    cache = await redis.get_pair(key=key)
+
+async def get_raw_cache(key: str) -> bytes | None:
+    """
+    Возвращает строку JSON по ключу из кэша процесса (L1), а при ее отсутствии - из Redis (L2)
+
+    :param key: ключ, по которому нужно получить значение
+    :return: строка JSON в байтах или None
+    """
+
+    cache, _ = await get_raw_cache_with_etag(key=key)
 
     return cache
 
 
-async def create_cache(key: str, value: list[Any] | dict[Any, Any]) -> None:
+async def get_raw_cache_with_etag(key: str) -> tuple[bytes | None, str | None]:
+    """
+    Возвращает строку JSON по ключу вместе с ее ETag из кэша процесса (L1), а при ее отсутствии - из Redis (L2)
+
+    :param key: ключ, по которому нужно получить значение
+    :return: строка JSON в байтах и ETag или (None, None)
+    """
+
+    family = get_key_family(key)
+
+    with observe_latency(operation='get', family=family):
+        item = local_cache.get(key)
+
+        if item is not None:
+            cache_stats.increment('l1_hits')
+            count(cache_hits, family=family, level='l1')
+            return item
+
+        cache_stats.increment('l1_misses')
+
+        cache, etag = await redis_tools.get_raw_pair_with_etag(key=key)
+
+    if cache is not None:
+        cache_stats.increment('l2_hits')
+        count(cache_hits, family=family, level='l2')
+
+        # Значения, записанные без ETag, хэшируются один раз при попадании в L1.
+        etag = etag or make_etag(cache)
+        local_cache.set(key, (cache, etag))
+    else:
+        cache_stats.increment('l2_misses')
+        count(cache_misses, family=family)
+
+    return cache, etag
+
+
+async def create_cache(key: str, value: list[Any] | dict[Any, Any], ttl: int | None = CACHE_TTL) -> None:
     """
     Создает пару ключ: значение в Redis
 
     :param key: ключ, для доступа к данным
     :param value: данные, которые будут хранится по этому ключу
+    :param ttl: время жизни ключа в секундах, None - без ограничения
+    :return: None
+    """
+    await redis_tools.set_pair(key=key, value=value, ttl=ttl)
+    count(cache_sets, family=get_key_family(key))
+
+    local_cache.delete(key)
+
+
+def make_json_response(
+        content: bytes,
+        etag: str | None = None,
+        headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Формирует ответ из строки JSON, взятой из кэша, без десериализации и повторной сериализации. Ответ получает
+    строгий ETag по содержимому, по которому ConditionalGetMiddleware отвечает 304 на условные запросы.
+
+    :param content: строка JSON в байтах
+    :param etag: ETag, сохраненный вместе со значением. Если не передан, вычисляется по content
+    :param headers: дополнительные заголовки ответа
+    :return: Response
+    """
+
+    return Response(
+        content=content,
+        media_type='application/json',
+        headers={**(headers or {}), 'ETag': '"' + (etag or make_etag(content)) + '"'},
+    )
+
+
+async def get_or_create_cache(key: str, build: Callable[[], Awaitable[Any]]) -> Response | None:
+    """
+    Возвращает ответ со значением ключа из кэша, а при промахе собирает значение функцией build и сохраняет в кэш.
+    В кэше хранится готовое тело ответа, поэтому при попадании оно отдается клиенту как есть.
+
+    При одновременных промахах по одному ключу build выполняется один раз: запросы этого процесса ждут future
+    пересборки, а другие воркеры ждут снятия блокировки в Redis и читают уже собранное значение.
+
+    :param key: ключ, по которому нужно получить значение
+    :param build: функция, которая собирает значение из БД. Если она вернула None, значение не кэшируется
+    :return: Response с телом из кэша или None, если build вернула None
+    """
+
+    cache, etag = await get_raw_cache_with_etag(key=key)
+
+    if cache is None:
+        cache = await rebuild_missed_cache(key=key, build=build, ttl=get_key_ttl(key))
+
+    return make_json_response(content=cache, etag=etag) if cache is not None else None
+
+
+async def rebuild_missed_cache(
+        key: str,
+        build: Callable[[], Awaitable[Any]],
+        ttl: int | None,
+        stale_key: str | None = None,
+) -> bytes | None:
+    """
+    Собирает значение ключа после промаха. Если этот процесс уже пересобирает ключ, дожидается результата.
+
+    :param key: ключ, значение которого нужно собрать
+    :param build: функция, которая собирает значение из БД
+    :param ttl: время жизни ключа в секундах
+    :param stale_key: ключ, под которым дополнительно сохраняется копия значения для режима stale-while-revalidate
+    :return: собранное значение в виде строки JSON
+    """
+
+    while (rebuild := cache_rebuilds.get(key)) is not None:
+        try:
+            return await asyncio.shield(rebuild)
+        except asyncio.CancelledError:
+            # Если отменили пересборку, а не ожидающий запрос, пересборку выполнит он сам.
+            if not rebuild.cancelled():
+                raise
+
+    return await run_rebuild(key=key, rebuild=rebuild_cache(key=key, build=build, ttl=ttl, stale_key=stale_key))
+
+
+async def run_rebuild(key: str, rebuild: Awaitable[Any]) -> Any:
+    """
+    Выполняет пересборку ключа, публикуя ее результат для остальных запросов процесса через future.
+
+    :param key: ключ, значение которого пересобирается
+    :param rebuild: корутина пересборки
+    :return: результат пересборки
+    """
+
+    future = asyncio.get_running_loop().create_future()
+    # Исключение пересборки получают ожидающие запросы, если их нет - оно помечается как обработанное.
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+    cache_rebuilds[key] = future
+
+    try:
+        value = await rebuild
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as error:
+        future.set_exception(error)
+        raise
+    else:
+        future.set_result(value)
+    finally:
+        del cache_rebuilds[key]
+
+    return value
+
+
+async def rebuild_cache(
+        key: str,
+        build: Callable[[], Awaitable[Any]],
+        ttl: int | None,
+        stale_key: str | None = None,
+) -> bytes | None:
+    """
+    Собирает значение под блокировкой в Redis. Если блокировку держит другой воркер, ждет, пока значение появится в
+    кэше или блокировка будет снята (например, если значение не кэшируется или воркер завершился).
+
+    :param key: ключ, значение которого нужно собрать
+    :param build: функция, которая собирает значение из БД
+    :param ttl: время жизни ключа в секундах
+    :param stale_key: ключ для копии значения в режиме stale-while-revalidate
+    :return: собранное значение в виде строки JSON
+    """
+
+    lock_key = LOCK_KEY_PREFIX + key
+    token = uuid.uuid4().hex
+
+    while not await redis_tools.acquire_lock(key=lock_key, token=token, timeout=CACHE_LOCK_TIMEOUT):
+        await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+
+        cache = await redis_tools.get_raw_pair(key=key)
+
+        if cache is not None:
+            return cache
+
+    return await build_cache_under_lock(key=key, build=build, ttl=ttl, stale_key=stale_key, token=token)
+
+
+async def build_cache_under_lock(
+        key: str,
+        build: Callable[[], Awaitable[Any]],
+        ttl: int | None,
+        stale_key: str | None,
+        token: str,
+) -> bytes | None:
+    """
+    Собирает и сохраняет значение ключа, после чего снимает захваченную блокировку.
+
+    :param key: ключ, значение которого нужно собрать
+    :param build: функция, которая собирает значение из БД
+    :param ttl: время жизни ключа в секундах
+    :param stale_key: ключ для копии значения в режиме stale-while-revalidate
+    :param token: токен, с которым захвачена блокировка
+    :return: собранное значение в виде строки JSON
+    """
+
+    try:
+        # Значение могло быть собрано другим воркером между промахом и захватом блокировки.
+        cache = await redis_tools.get_raw_pair(key=key)
+
+        if cache is not None:
+            return cache
+
+        family = get_key_family(key)
+        write_through_generation = await redis_tools.get_raw_pair(key=WRITE_THROUGH_KEY)
+
+        with observe_latency(operation='build', family=family):
+            value = await build()
+
+            if value is None:
+                return None
+
+            # Значение сериализуется один раз: эта же строка сохраняется в кэш и отдается клиенту.
+            cache = await redis_tools.prepare_value(value)
+
+            pairs = {key: cache}
+
+            if stale_key is not None:
+                pairs[stale_key] = cache
+
+            is_stored = await redis_tools.set_raw_pairs_if_unchanged(
+                pairs=pairs,
+                ttl=ttl,
+                watch_key=WRITE_THROUGH_KEY,
+                watch_value=write_through_generation,
+            )
+
+        if is_stored:
+            count(cache_sets, family=family)
+            local_cache.delete(*pairs)
+    finally:
+        await redis_tools.release_lock(key=LOCK_KEY_PREFIX + key, token=token)
+
+    return cache
+
+
+async def revalidate_cache(
+        key: str,
+        build: Callable[[AsyncSession], Awaitable[Any]],
+        ttl: int | None,
+        stale_key: str,
+) -> None:
+    """
+    Пересобирает ключ в фоне, пока клиентам отдается устаревшее значение. Ничего не делает, если ключ уже
+    пересобирается этим процессом или другим воркером.
+
+    Сессия запроса к этому моменту уже закрыта зависимостью, поэтому build получает собственную сессию, которая
+    закрывается после пересборки.
+
+    :param key: ключ, значение которого нужно собрать
+    :param build: функция, которая собирает значение из БД в переданной сессии
+    :param ttl: время жизни ключа в секундах
+    :param stale_key: ключ для копии значения
     :return: None
     """
-    redis = RedisTools()
 
-    await redis.set_pair(key=key, value=value)
+    if key in cache_rebuilds:
+        return
+
+    token = uuid.uuid4().hex
+
+    if not await redis_tools.acquire_lock(key=LOCK_KEY_PREFIX + key, token=token, timeout=CACHE_LOCK_TIMEOUT):
+        return
+
+    if key in cache_rebuilds:
+        await redis_tools.release_lock(key=LOCK_KEY_PREFIX + key, token=token)
+        return
+
+    async with get_read_session_maker()() as session:
+        await run_rebuild(
+            key=key,
+            rebuild=build_cache_under_lock(
+                key=key, build=lambda: build(session), ttl=ttl, stale_key=stale_key, token=token
+            ),
+        )
+
+
+async def get_write_through_generation() -> bytes | None:
+    """
+    Возвращает значение счетчика обновлений кэша на месте. Читается до выборки данных из БД и передается в
+    warm_cache.
+
+    :return: значение счетчика
+    """
+
+    return await redis_tools.get_raw_pair(key=WRITE_THROUGH_KEY)
+
+
+async def warm_cache(pairs: dict[str, Any], write_through_generation: bytes | None) -> bool:
+    """
+    Сохраняет заранее собранные значения ключей одной транзакцией с временем жизни их семейств. Для семейств в
+    режиме stale-while-revalidate сохраняется и копия значения, как при пересборке ключа запросом.
+
+    :param pairs: словарь ключ с версиями: значение
+    :param write_through_generation: значение счетчика обновлений кэша на месте до выборки данных из БД
+    :return: True, если значения сохранены, False - если кэш обновлялся на месте после выборки
+    """
+
+    raw_pairs: dict[str, bytes] = {}
+    ttls: dict[str, int | None] = {}
+
+    for key, value in pairs.items():
+        family = get_key_family(key)
+
+        raw_pairs[key] = await redis_tools.prepare_value(value)
+        ttls[key] = get_key_ttl(key)
+
+        if CACHE_STALE_TTL.get(family):
+            stale_key = get_stale_key(key)
+            raw_pairs[stale_key] = raw_pairs[key]
+            ttls[stale_key] = ttls[key]
+
+    is_stored = await redis_tools.set_raw_pairs_if_unchanged(
+        pairs=raw_pairs,
+        ttl=ttls,
+        watch_key=WRITE_THROUGH_KEY,
+        watch_value=write_through_generation,
+    )
+
+    if is_stored:
+        for key in pairs:
+            count(cache_sets, family=get_key_family(key))
+
+        local_cache.delete(*raw_pairs)
+
+    return is_stored
+
+
+async def get_cache_many(keys: list[str]) -> list[list[dict[Any, Any]] | dict[Any, Any] | None]:
+    """
+    Возвращает значения нескольких ключей из Redis за один сетевой запрос
+
+    :param keys: ключи, по которым нужно получить значения
+    :return: список значений в порядке переданных ключей, для отсутствующих ключей - None
+    """
+
+    return await redis_tools.get_pairs(keys=keys)
+
+
+async def create_cache_many(pairs: dict[str, list[Any] | dict[Any, Any]], ttl: int | None = None) -> None:
+    """
+    Создает несколько пар ключ: значение в Redis за один сетевой запрос
+
+    :param pairs: словарь ключ: значение
+    :param ttl: время жизни ключей в секундах, None - без ограничения
+    :return: None
+    """
+
+    await redis_tools.set_pairs(pairs=pairs, ttl=ttl)
+
+    for key in pairs:
+        count(cache_sets, family=get_key_family(key))
+
+    local_cache.delete(*pairs)
 
 
 async def delete_all_cache() -> None:
-    redis = RedisTools()
-    await redis.invalidate_all_cache()
+    """
+    Удаляет все ключи приложения, кроме счетчиков версий, после чего увеличивает глобальную версию.
+
+    Счетчики сохраняются, чтобы ключи, записанные во время очистки под текущими версиями, не стали снова доступны
+    после сброса счетчиков. Увеличение глобальной версии отсекает menus и menus_detail, записанные во время очистки.
+
+    :return: None
+    """
+    local_cache.clear()
+
+    with observe_latency(operation='invalidate', family='*'):
+        await redis_tools.invalidate_all_cache(
+            keep_prefix=VERSION_KEY_PREFIX,
+            notify_channel=CACHE_INVALIDATION_CHANNEL
+        )
+        await redis_tools.invalidate_cache_many(
+            keys=[],
+            counters=get_version_keys(),
+            notify_channel=CACHE_INVALIDATION_CHANNEL
+        )
+
+    count(cache_invalidations, family='*')
 
 
 async def delete_cache_by_key(key: str) -> None:
@@ -55,64 +473,569 @@ async def delete_cache_by_key(key: str) -> None:
     :return: None
     """
 
-    redis = RedisTools()
+    await delete_cache_by_keys(keys=[key])
+
+
+async def delete_cache_by_keys(keys: list[str]) -> None:
+    """
+    Удаляет данные по нескольким ключам за один сетевой запрос
+
+    :param keys: ключи, по которым нужно удалить данные
+    :return: None
+    """
 
-    await redis.invalidate_cache(key=key)
+    await invalidate_cache_keys(keys=keys)
 
 
-async def delete_linked_menu_cache(
-        submenus_for_menu: list[Submenu],
-        target_menu_id: str,
-        background_tasks: BackgroundTasks,
-        session: AsyncSession = Depends(get_async_session)
+async def invalidate_cache_keys(
+        keys: list[str],
+        version_keys: list[str] | None = None,
+        patched_keys: list[str] | None = None,
 ) -> None:
     """
-    Удаляет данные из кэша связанные с меню
+    Удаляет ключи и увеличивает счетчики версий за один сетевой запрос, оповещая остальные воркеры
 
-    :param submenus_for_menu: подменю связанные с меню
-    :param target_menu_id: id меню
-    :param background_tasks: объект фоновых задач FastAPI
-    :param session: сессия подключения к БД
+    :param keys: ключи, по которым нужно удалить данные
+    :param version_keys: ключи счетчиков версий, которые нужно увеличить
+    :param patched_keys: ключи, обновленные на месте: они не удаляются, но вытесняются из кэша процессов
     :return: None
     """
-    submenus_cache_key = target_menu_id + '_submenus'
 
-    background_tasks.add_task(delete_cache_by_key, submenus_cache_key)
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    version_keys = version_keys or []
+    patched_keys = patched_keys or []
+
+    if not keys and not version_keys and not patched_keys:
+        return
+
+    families = [get_key_family(key) for key in keys + version_keys + patched_keys]
+
+    local_cache.delete(*keys, *version_keys, *patched_keys)
 
-    for submenu in submenus_for_menu:
-        dishes_cache_key = target_menu_id + '_' + str(submenu.id) + '_dishes'
-        background_tasks.add_task(delete_cache_by_key, dishes_cache_key)
+    # После увеличения версии меню хэш с его поддеревом недостижим и удаляется целиком в том же pipeline, не дожидаясь
+    # истечения. Процессы не оповещаются: ключи старой версии в их L1 уже недостижимы.
+    menu_tree_key_prefixes = {
+        version_key: get_menu_tree_key_prefix(menu_id=version_key[len(MENU_VERSION_KEY_PREFIX):])
+        for version_key in version_keys
+        if version_key.startswith(MENU_VERSION_KEY_PREFIX)
+    }
 
-        await delete_linked_submenu_cache(
-            target_submenu_id=str(submenu.id),
-            target_menu_id=target_menu_id,
-            background_tasks=background_tasks,
-            session=session
+    # Запрос обычно инвалидирует ключи нескольких семейств одним pipeline, поэтому длительность размечается их набором.
+    with observe_latency(operation='invalidate', family=','.join(sorted(set(families)))):
+        await redis_tools.invalidate_cache_many(
+            keys=keys,
+            counters=version_keys,
+            notify_channel=CACHE_INVALIDATION_CHANNEL,
+            notify_keys=patched_keys,
+            versioned_key_prefixes=menu_tree_key_prefixes,
         )
-        background_tasks.add_task(delete_cache_by_key, str(submenu.id))
 
+    for family in families[:len(keys) + len(version_keys)]:
+        count(cache_invalidations, family=family)
 
-async def delete_linked_submenu_cache(
-        target_submenu_id: str,
-        target_menu_id: str,
-        background_tasks: BackgroundTasks,
-        session: AsyncSession = Depends(get_async_session)
-) -> None:
+    if menu_tree_key_prefixes:
+        count(cache_invalidations, family=MENU_TREE_FAMILY, amount=len(menu_tree_key_prefixes))
+
+
+def evict_local_cache(keys: list[str] | str) -> None:
+    """
+    Удаляет из кэша процесса ключи, инвалидированные любым из воркеров
+
+    :param keys: список ключей или '*' для очистки всего кэша
+    :return: None
+    """
+
+    if keys == '*':
+        local_cache.clear()
+    else:
+        local_cache.delete(*keys)
+
+
+def handle_cache_invalidation(keys: list[str] | str) -> None:
+    """
+    Обрабатывает сообщение об инвалидации кэша: вытесняет ключи из кэша процесса и направляет чтения процесса в
+    основную БД - запись могла еще не дойти до реплики, а значения новой версии не должны собираться из нее.
+
+    :param keys: список ключей или '*' для очистки всего кэша
+    :return: None
+    """
+
+    evict_local_cache(keys)
+    route_reads_to_primary()
+
+
+def enable_local_cache() -> None:
+    local_cache.clear()
+    local_cache.enabled = True
+
+
+async def listen_cache_invalidations() -> None:
     """
-    Удаляет данные из кэша связанные с подменю
+    Подписывается на канал инвалидации кэша. Пока подписка активна, работает кэш процесса (L1).
+    При разрыве соединения L1 отключается и очищается, чтобы не отдавать данные, устаревшие сильнее, чем на
+    CACHE_LOCAL_TTL.
 
-    :param target_submenu_id: id подменю
-    :param target_menu_id: id связанного с ним меню
-    :param background_tasks: объект фоновых задач FastAPI
-    :param session: сессия подключения к БД.
     :return: None
     """
-    dishes = await get_dishes_for_submenu(target_submenu_id=target_submenu_id, session=session)
 
-    dishes_cache_key = target_menu_id + '_' + target_submenu_id + '_dishes'
-    background_tasks.add_task(delete_cache_by_key, dishes_cache_key)
+    while True:
+        try:
+            await redis_tools.listen_channel(
+                channel=CACHE_INVALIDATION_CHANNEL,
+                on_subscribe=enable_local_cache,
+                on_message=handle_cache_invalidation,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.exception('Подписка на канал инвалидации кэша прервана')
+        finally:
+            local_cache.enabled = False
+            local_cache.clear()
+
+        await asyncio.sleep(1)
+
+
+def get_version_keys(menu_id: str | None = None, submenu_id: str | None = None) -> list[str]:
+    """
+    Возвращает ключи счетчиков версий для пространства имен кэша.
+
+    Пространства имен:
+        - глобальное: menus, menus_detail;
+        - меню (версия хэша меню): поля menu, submenus;
+        - подменю (версия хэша меню + версия поля): поля submenu:<submenu_id>, dishes:<submenu_id>,
+          dish:<submenu_id>_<dish_id>.
+
+    :param menu_id: id меню
+    :param submenu_id: id подменю
+    :return: список ключей счетчиков
+    """
+
+    if menu_id is None:
+        return [VERSION_KEY_PREFIX + 'global']
+
+    version_keys = [VERSION_KEY_PREFIX + 'menu:' + menu_id]
+
+    if submenu_id is not None:
+        version_keys.append(VERSION_KEY_PREFIX + 'submenu:' + submenu_id)
+
+    return version_keys
+
+
+def get_menu_tree_key_prefix(menu_id: str) -> str:
+    """
+    Возвращает префикс ключей хэшей с поддеревом меню: к нему добавляется версия меню.
+
+    :param menu_id: id меню
+    :return: префикс ключа хэша
+    """
+
+    return MENU_TREE_KEY_PREFIX + menu_id + ':v'
+
+
+def get_menu_tree_key(menu_id: str, version: int) -> str:
+    """
+    Возвращает ключ хэша, в котором хранится поддерево меню.
+
+    :param menu_id: id меню
+    :param version: версия меню
+    :return: ключ хэша
+    """
+
+    return get_menu_tree_key_prefix(menu_id=menu_id) + str(version)
+
+
+async def get_versioned_cache_key(
+        family: str,
+        key: str | None = None,
+        menu_id: str | None = None,
+        submenu_id: str | None = None,
+) -> str:
+    """
+    Формирует ключ вида <семейство>:<ключ>:v<версии пространства имен>. После увеличения версии старые ключи
+    становятся недостижимыми и удаляются Redis по истечении времени жизни семейства.
+
+    Ключи меню и его подменю - это поля хэша поддерева меню: tree:<menu_id>:v<версия меню>|<семейство>[:<ключ>], для
+    подменю к полю добавляется :v<версия подменю>. Поэтому любое чтение в рамках меню - это одна команда HGET.
+
+    Ключ нужно получить до выборки данных из БД, чтобы данные, прочитанные до инвалидации, не были сохранены под
+    новой версией.
+
+    :param family: семейство ключа (menus, menus_detail, menu, submenus, submenu, dishes, dish)
+    :param key: ключ внутри семейства, если семейство содержит больше одного ключа
+    :param menu_id: id меню, если ключ относится к меню или его подменю
+    :param submenu_id: id подменю, если ключ относится к подменю или его блюдам
+    :return: ключ с версиями
+    """
+
+    version_keys = get_version_keys(menu_id=menu_id, submenu_id=submenu_id)
+
+    versions = [local_cache.get(version_key) for version_key in version_keys]
+    missing_version_keys = [version_key for version_key, version in zip(version_keys, versions) if version is None]
+
+    if missing_version_keys:
+        fetched_versions = dict(zip(missing_version_keys, await redis_tools.get_pairs(keys=missing_version_keys)))
+
+        for index, version_key in enumerate(version_keys):
+            if versions[index] is None:
+                versions[index] = fetched_versions[version_key] or 0
+                local_cache.set(version_key, versions[index])
+
+    base_key = family if key is None else family + ':' + key
+
+    if menu_id is None:
+        return base_key + ':v' + str(versions[0])
+
+    field = base_key if submenu_id is None else base_key + ':v' + str(versions[1])
+
+    return get_menu_tree_key(menu_id=menu_id, version=versions[0]) + HASH_FIELD_SEPARATOR + field
+
+
+async def get_entity_cache_keys(
+        menu_id: str,
+        submenu_id: str | None = None,
+        dish_id: str | None = None,
+) -> list[str]:
+    """
+    Возвращает ключи с текущими версиями, значения которых содержат меню, подменю или блюдо.
+
+    :param menu_id: id меню
+    :param submenu_id: id подменю, если нужны ключи подменю или блюда
+    :param dish_id: id блюда, если нужны ключи блюда
+    :return: список ключей
+    """
+
+    keys = [await get_versioned_cache_key('menus_detail')]
+
+    if submenu_id is None:
+        keys.append(await get_versioned_cache_key('menus'))
+        keys.append(await get_versioned_cache_key('menu', menu_id=menu_id))
+
+        return keys
+
+    keys.append(await get_versioned_cache_key('submenus', menu_id=menu_id))
+    keys.append(await get_versioned_cache_key('submenu', submenu_id, menu_id=menu_id, submenu_id=submenu_id))
+
+    if dish_id is not None:
+        keys.append(await get_versioned_cache_key('dishes', submenu_id, menu_id=menu_id, submenu_id=submenu_id))
+        keys.append(
+            await get_versioned_cache_key('dish', submenu_id + '_' + dish_id, menu_id=menu_id, submenu_id=submenu_id)
+        )
+
+    return keys
+
+
+def patch_entity(value: Any, entity_id: str, fields: dict[str, Any]) -> None:
+    """
+    Обновляет поля всех объектов с переданным id в десериализованном значении кэша: в самом значении, в списках и
+    во вложенных списках (подменю меню, блюда подменю).
+
+    :param value: значение кэша
+    :param entity_id: id объекта
+    :param fields: новые значения полей
+    :return: None
+    """
+
+    if isinstance(value, list):
+        for item in value:
+            patch_entity(value=item, entity_id=entity_id, fields=fields)
+    elif isinstance(value, dict):
+        if value.get('id') == entity_id:
+            value.update(fields)
+
+        for item in value.values():
+            if isinstance(item, list):
+                patch_entity(value=item, entity_id=entity_id, fields=fields)
+
+
+async def write_through_cache(
+        fields: dict[str, Any],
+        menu_id: str,
+        submenu_id: str | None = None,
+        dish_id: str | None = None,
+) -> tuple[list[str], bool]:
+    """
+    Обновляет на месте все значения кэша, содержащие измененный объект, не меняя версий пространств имен. Ключи,
+    которых нет в кэше, не создаются - их соберут запросы.
+
+    Счетчик обновлений на месте увеличивается до обновления: сборки из БД, начатые раньше, не сохранят значения,
+    прочитанные до изменения.
+
+    :param fields: новые значения полей объекта в формате ответа
+    :param menu_id: id меню
+    :param submenu_id: id подменю, если изменено подменю или блюдо
+    :param dish_id: id блюда, если изменено блюдо
+    :return: обновленные ключи и False, если часть значений не удалось обновить из-за параллельных записей
+    """
+
+    entity_id = dish_id or submenu_id or menu_id
+
+    await redis_tools.increment(key=WRITE_THROUGH_KEY)
+
+    keys = await get_entity_cache_keys(menu_id=menu_id, submenu_id=submenu_id, dish_id=dish_id)
+    keys += [get_stale_key(key) for key in keys if CACHE_STALE_TTL.get(get_key_family(key))]
+
+    def patch(value: bytes) -> bytes:
+        cache = loads(value)
+        patch_entity(value=cache, entity_id=entity_id, fields=fields)
+
+        return dumps(cache)
+
+    families = sorted({get_key_family(key) for key in keys})
+
+    with observe_latency(operation='write_through', family=','.join(families)):
+        patched_keys, is_complete = await redis_tools.patch_pairs(keys=keys, patch=patch)
+
+    for key in patched_keys:
+        count(cache_sets, family=get_key_family(key))
+
+    return patched_keys, is_complete
+
+
+def get_key_family(key: str) -> str:
+    """
+    Возвращает семейство ключа кэша. Для служебных ключей (копии stale-while-revalidate, блокировки) возвращается
+    семейство ключа, к которому они относятся, для полей хэша меню - семейство поля.
+
+    :param key: ключ без префикса приложения
+    :return: семейство
+    """
+
+    for prefix in (STALE_KEY_PREFIX, STALE_SINCE_KEY_PREFIX, LOCK_KEY_PREFIX):
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+            break
+
+    redis_key, field = split_key(key)
+
+    return (redis_key if field is None else field).partition(':')[0]
+
+
+def get_key_ttl(key: str) -> int | None:
+    """
+    Возвращает время жизни ключа кэша. Поле хэша меню живет столько же, сколько хэш, поэтому для него берется время
+    жизни семейства tree.
+
+    :param key: ключ без префикса приложения
+    :return: время жизни в секундах, None - без ограничения
+    """
+
+    return get_cache_ttl(get_key_family(key) if split_key(key)[1] is None else MENU_TREE_FAMILY)
+
+
+def get_stale_key(key: str) -> str:
+    """
+    Возвращает ключ копии значения для режима stale-while-revalidate. Копия хранится строкой под ключом без версий
+    (для поля хэша меню - <поле>:tree:<menu_id>), поэтому переживает инвалидацию пространства имен и удаление хэша.
+
+    :param key: ключ с версиями
+    :return: ключ копии
+    """
+
+    redis_key, field = split_key(key)
+
+    if field is None:
+        return STALE_KEY_PREFIX + redis_key.rpartition(':v')[0]
+
+    field = field.rpartition(':v')[0] if ':v' in field else field
+
+    return STALE_KEY_PREFIX + field + ':' + redis_key.rpartition(':v')[0]
+
+
+def get_cache_ttl(family: str) -> int | None:
+    """
+    Возвращает время жизни ключа семейства со случайной надбавкой до CACHE_TTL_JITTER от времени жизни, чтобы ключи,
+    записанные одновременно (например, после синхронизации с Google Sheets), не истекали одновременно.
+
+    :param family: семейство ключа
+    :return: время жизни в секундах, None - без ограничения
+    """
+
+    ttl = CACHE_TTL_BY_FAMILY.get(family, CACHE_TTL)
+
+    if not ttl:
+        return None
+
+    return ttl + int(random.uniform(0, ttl * CACHE_TTL_JITTER))
+
+
+async def get_cache_memory_report() -> dict[str, dict[str, Any]]:
+    """
+    Считает память Redis, занятую ключами каждого семейства, и сравнивает ее с бюджетом из CACHE_MEMORY_BUDGET.
+    Ключи перебираются порциями (SCAN), поэтому отчет не блокирует Redis, но на большом кэше строится заметное время.
+
+    :return: словарь семейство: {keys, bytes, budget, budget_usage}
+    """
+
+    report: dict[str, dict[str, Any]] = {}
+
+    async for key, memory_usage in redis_tools.scan_memory_usage():
+        family = 'version' if key.startswith(VERSION_KEY_PREFIX) else get_key_family(key)
+        family_report = report.setdefault(family, {'keys': 0, 'bytes': 0})
+
+        family_report['keys'] += 1
+        family_report['bytes'] += memory_usage
+
+    for family in CACHE_MEMORY_BUDGET:
+        report.setdefault(family, {'keys': 0, 'bytes': 0})
+
+    for family, family_report in report.items():
+        budget = CACHE_MEMORY_BUDGET.get(family)
+
+        family_report['budget'] = budget
+        family_report['budget_usage'] = family_report['bytes'] / budget if budget else None
+
+        if budget and family_report['bytes'] > budget:
+            logging.warning(
+                'Кэш семейства %s занимает %s байт при бюджете %s', family, family_report['bytes'], budget
+            )
+
+    return report
+
+
+class CacheRevalidation:
+    """
+    Зависимость FastAPI для режима stale-while-revalidate. После инвалидации агрегирующего ключа запрос получает
+    предыдущее значение с заголовком X-Cache-Status: STALE, а новое собирается одной фоновой задачей после ответа.
+
+    Предыдущее значение отдается не дольше CACHE_STALE_TTL[<семейство ключа>] секунд с первого промаха по новой
+    версии ключа. При нулевом окне ключ пересобирается синхронно, как в get_or_create_cache.
+    """
+
+    def __init__(self, background_tasks: BackgroundTasks):
+        self.background_tasks = background_tasks
+
+    async def get_or_create_cache(
+            self,
+            key: str,
+            build: Callable[[AsyncSession], Awaitable[Any]],
+            session: AsyncSession,
+    ) -> Response | None:
+        """
+        Возвращает ответ со значением ключа из кэша, при промахе - с предыдущим значением, если оно еще допустимо,
+        иначе собирает новое.
+
+        Синхронная сборка выполняется в сессии запроса. Фоновая пересборка выполняется после закрытия этой сессии,
+        поэтому для нее revalidate_cache открывает отдельную.
+
+        :param key: ключ с версиями, полученный из get_versioned_cache_key
+        :param build: функция, которая собирает значение из БД в переданной сессии
+        :param session: сессия подключения к БД текущего запроса
+        :return: Response со значением из кэша, предыдущим значением или результатом build
+        """
+
+        family = get_key_family(key)
+        stale_ttl = CACHE_STALE_TTL.get(family, 0)
+
+        if not stale_ttl:
+            return await get_or_create_cache(key=key, build=lambda: build(session))
+
+        ttl = get_key_ttl(key)
+
+        cache, etag = await get_raw_cache_with_etag(key=key)
+
+        if cache is not None:
+            return make_json_response(content=cache, etag=etag)
+
+        stale_key = get_stale_key(key)
+
+        stale_cache, stale_since = await redis_tools.get_stale_pair(
+            key=stale_key,
+            since_key=STALE_SINCE_KEY_PREFIX + key,
+            since_ttl=ttl or CACHE_TTL,
+        )
+
+        if stale_cache is not None and time.time() - stale_since <= stale_ttl:
+            count(cache_hits, family=family, level='stale')
+            self.background_tasks.add_task(revalidate_cache, key=key, build=build, ttl=ttl, stale_key=stale_key)
+
+            return make_json_response(content=stale_cache, headers={'X-Cache-Status': 'STALE'})
+
+        cache = await rebuild_missed_cache(key=key, build=lambda: build(session), ttl=ttl, stale_key=stale_key)
+
+        return make_json_response(content=cache) if cache is not None else None
+
+
+class CacheInvalidation:
+    """
+    Зависимость FastAPI, которая собирает все ключи и пространства имен кэша, затронутые запросом, и инвалидирует их
+    одним pipeline в фоновой задаче после отправки ответа. Значения с измененными (PATCH) объектами обновляются на
+    месте в той же задаче.
+    """
+
+    def __init__(self, background_tasks: BackgroundTasks):
+        self.background_tasks = background_tasks
+        self.keys: list[str] = []
+        self.version_keys: list[str] = []
+        self.write_throughs: list[dict[str, Any]] = []
+        self.is_scheduled = False
+
+    def schedule(self) -> None:
+        if not self.is_scheduled:
+            self.background_tasks.add_task(self.execute)
+            self.is_scheduled = True
+
+    def delete(self, *keys: str) -> None:
+        """
+        Добавляет ключи, которые нужно удалить.
+
+        :param keys: ключи
+        :return: None
+        """
+        self.keys += [key for key in keys if key not in self.keys]
+        self.schedule()
+
+    def invalidate_namespaces(self, menu_id: str | None = None, submenu_id: str | None = None) -> None:
+        """
+        Добавляет пространства имен, версии которых нужно увеличить: глобальное и, если переданы, меню и подменю.
+        Не требует обращений к БД и не зависит от количества подменю и блюд.
+
+        :param menu_id: id меню, данные которого изменились
+        :param submenu_id: id подменю, данные которого изменились
+        :return: None
+        """
+
+        version_keys = get_version_keys()
+
+        if menu_id is not None:
+            version_keys += get_version_keys(menu_id=menu_id, submenu_id=submenu_id)
+
+        self.version_keys += [version_key for version_key in version_keys if version_key not in self.version_keys]
+        self.schedule()
+
+    def write_through(
+            self,
+            fields: dict[str, Any],
+            menu_id: str,
+            submenu_id: str | None = None,
+            dish_id: str | None = None,
+    ) -> None:
+        """
+        Добавляет измененный объект, значения кэша с которым нужно обновить на месте. Если write-through выключен
+        (CACHE_WRITE_THROUGH), инвалидирует пространства имен объекта.
+
+        :param fields: новые значения полей объекта в формате ответа
+        :param menu_id: id меню
+        :param submenu_id: id подменю, если изменено подменю или блюдо
+        :param dish_id: id блюда, если изменено блюдо
+        :return: None
+        """
+
+        if not CACHE_WRITE_THROUGH:
+            self.invalidate_namespaces(menu_id=menu_id, submenu_id=submenu_id)
+            return
+
+        self.write_throughs.append({'fields': fields, 'menu_id': menu_id, 'submenu_id': submenu_id, 'dish_id': dish_id})
+        self.schedule()
+
+    async def execute(self) -> None:
+        patched_keys = []
+
+        for write_through in self.write_throughs:
+            write_through_keys, is_complete = await write_through_cache(**write_through)
+            patched_keys += write_through_keys
+
+            # Значения, которые не удалось обновить на месте, становятся недостижимыми после увеличения версий.
+            if not is_complete:
+                self.invalidate_namespaces(menu_id=write_through['menu_id'], submenu_id=write_through['submenu_id'])
 
-    for dish in dishes:
-        specific_dish_cache_key = target_menu_id + '_' + target_submenu_id + '_' + str(dish.id)
-        background_tasks.add_task(delete_cache_by_key, specific_dish_cache_key)
+        await invalidate_cache_keys(keys=self.keys, version_keys=self.version_keys, patched_keys=patched_keys)
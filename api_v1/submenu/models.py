@@ -2,19 +2,21 @@
 Модуль для описания класса модели БД.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 20 января 2024
+Дата: 17 октября 2026 | Индекс (menu_id, id)
 """
 
 import uuid
 from typing import Any
 
 from menu.models import Base
-from sqlalchemy import UUID, Column, ForeignKey, String
+from sqlalchemy import UUID, Column, ForeignKey, Index, String
 from sqlalchemy.orm import relationship
 
 
 class Submenu(Base):
     __tablename__ = 'submenus'
+    # Выборки подменю фильтруют и соединяют по menu_id (и id): индекс покрывает и внешний ключ.
+    __table_args__ = (Index('ix_submenus_menu_id_id', 'menu_id', 'id'),)
 
     id = Column(
         UUID(as_uuid=True), primary_key=True, nullable=False, default=uuid.uuid4
@@ -45,18 +47,18 @@ class Submenu(Base):
 
         if hasattr(self, 'dishes_count'):
             return {
-                'id': str(self.id),
+                'id': self.id,
                 'title': self.title,
                 'description': self.description,
                 'dishes': self.dishes,
                 'dishes_count': self.dishes_count,
-                'menu_id': str(self.menu_id),
+                'menu_id': self.menu_id,
             }
         else:
             return {
-                'id': str(self.id),
+                'id': self.id,
                 'title': self.title,
                 'description': self.description,
                 'dishes': self.dishes,
-                'menu_id': str(self.menu_id),
+                'menu_id': self.menu_id,
             }
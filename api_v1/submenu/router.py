@@ -2,28 +2,29 @@
 Модуль для обработки POST, GET, UPDATE, PATCH, DELETE методов для эндпоинтов, касающихся подменю.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 11 февраля 2024 | Добавлена очистка кэша с инфой о синхронизации с таблицей при выполнении CUD методов.
+Дата: 17 октября 2026 | Сборка значения для кэша получает сессию аргументом
 """
 from typing import Any
 
+from config import SQL_JSON_RENDERING
 from custom_router import CustomAPIRouter
-from database.database import get_async_session
+from database.database import get_async_read_session, get_async_session
 from database.database_services import (
     delete_submenu,
     get_dishes_for_submenu,
     insert_data,
     select_all_submenus,
+    select_all_submenus_json,
     select_specific_submenu,
     update_submenu,
 )
-from dish.dish_utils import apply_discount
-from fastapi import BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
+from fastapi import Depends
+from serialization import ORJSONResponse
 from services import (
-    create_cache,
-    delete_cache_by_key,
-    delete_linked_submenu_cache,
-    get_cache,
+    CacheInvalidation,
+    CacheRevalidation,
+    get_or_create_cache,
+    get_versioned_cache_key,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from submenu.models import Submenu
@@ -38,53 +39,53 @@ router = CustomAPIRouter(prefix='/api/v1/menus', tags=['submenu'])
 
 @router.get('/{target_menu_id}/submenus', name='submenu_base_url')
 async def submenu_get_method(
-        target_menu_id: str, session: AsyncSession = Depends(get_async_session)
+        target_menu_id: str,
+        cache_revalidation: CacheRevalidation = Depends(),
+        session: AsyncSession = Depends(get_async_read_session),
 ) -> list[dict[Any, Any]]:
     """
     Функция для обработки get запроса для выборки всех подменю, связанных с указанным меню.
 
     Args:
         target_menu_id: идентификатор меню, для которого идет поиск подменю
+        cache_revalidation: кэш с поддержкой stale-while-revalidate
         session: сессия подключения к БД.
 
     Returns: Список найденных объектов подменю.
 
     """
 
-    cache_key = target_menu_id + '_submenus'
-
-    cache = await get_cache(key=cache_key)
-
-    if cache is not None:
-        return cache
+    cache_key = await get_versioned_cache_key('submenus', menu_id=target_menu_id)
 
-    submenus = await select_all_submenus(target_menu_id=target_menu_id, session=session)
+    async def build_submenus(session: AsyncSession) -> list[dict[Any, Any]] | bytes:
+        if SQL_JSON_RENDERING:
+            return await select_all_submenus_json(target_menu_id=target_menu_id, session=session)
 
-    # Форматируем Submenu, чтобы в ответе цены блюд были строками и учитывали скидку.
-    formatted_submenus = await prepare_submenus_to_response(submenus=submenus, session=session)
+        submenus = await select_all_submenus(target_menu_id=target_menu_id, session=session)
 
-    await create_cache(key=cache_key, value=submenus)
+        # Форматируем Submenu, чтобы в ответе цены блюд были строками и учитывали скидку.
+        return await prepare_submenus_to_response(submenus=submenus)
 
-    return formatted_submenus
+    return await cache_revalidation.get_or_create_cache(key=cache_key, build=build_submenus, session=session)
 
 
 @router.post('/{target_menu_id}/submenus')
 async def submenu_post_method(
         target_menu_id: str,
         submenu_data: CreateSubmenu,
-        background_tasks: BackgroundTasks,
+        cache_invalidation: CacheInvalidation = Depends(),
         session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки POST запроса.
 
     Args:
         target_menu_id: идентификатор меню, с которым будет связано созданное подменю
         submenu_data: данные подменю, которое будет создано
-        background_tasks: Объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns:JSONResponse
+    Returns:ORJSONResponse
 
     """
 
@@ -104,21 +105,17 @@ async def submenu_post_method(
 
     created_submenu['dishes'] = await format_dishes(submenu_dishes)
 
-    cache_key = target_menu_id + '_submenus'
+    cache_invalidation.invalidate_namespaces(menu_id=target_menu_id)
+    cache_invalidation.delete('table_cache')
 
-    background_tasks.add_task(delete_cache_by_key, cache_key)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, target_menu_id)
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
-
-    return JSONResponse(content=created_submenu, status_code=201)
+    return ORJSONResponse(content=created_submenu, status_code=201)
 
 
 @router.get('/{target_menu_id}/submenus/{target_submenu_id}')
 async def submenu_get_specific_method(
         target_menu_id: str,
         target_submenu_id: str,
-        session: AsyncSession = Depends(get_async_session),
+        session: AsyncSession = Depends(get_async_read_session),
 ) -> dict[Any, Any]:
     """
     Функция для обработки get запроса по-указанному id.
@@ -132,26 +129,29 @@ async def submenu_get_specific_method(
 
     """
 
-    cache = await get_cache(key=target_submenu_id)
-
-    if cache is not None:
-        return cache
-
-    # Получаем определенное подменю
-    submenu = await select_specific_submenu(
-        target_menu_id=target_menu_id,
-        target_submenu_id=target_submenu_id,
-        session=session,
+    cache_key = await get_versioned_cache_key(
+        'submenu',
+        target_submenu_id,
+        menu_id=target_menu_id,
+        submenu_id=target_submenu_id
     )
 
-    if not submenu:
-        return JSONResponse(content={'detail': 'submenu not found'}, status_code=404)
+    async def build_submenu() -> dict[Any, Any] | None:
+        # Получаем определенное подменю
+        submenu = await select_specific_submenu(
+            target_menu_id=target_menu_id,
+            target_submenu_id=target_submenu_id,
+            session=session,
+        )
+
+        return await prepare_submenu_to_response(submenu=submenu) if submenu else None
 
-    submenu_json = await prepare_submenu_to_response(submenu=submenu, session=session)
+    response = await get_or_create_cache(key=cache_key, build=build_submenu)
 
-    await create_cache(key=target_submenu_id, value=submenu_json)
+    if response is None:
+        return ORJSONResponse(content={'detail': 'submenu not found'}, status_code=404)
 
-    return submenu_json
+    return response
 
 
 @router.patch('/{target_menu_id}/submenus/{target_submenu_id}')
@@ -159,9 +159,9 @@ async def submenu_patch_method(
         target_menu_id: str,
         target_submenu_id: str,
         update_submenu_data: UpdateSubmenu,
-        background_tasks: BackgroundTasks,
+        cache_invalidation: CacheInvalidation = Depends(),
         session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки PATCH запроса по-указанному id.
 
@@ -169,10 +169,10 @@ async def submenu_patch_method(
         target_menu_id: идентификатор меню, с которым должно быть связанно обновляемое подменю
         target_submenu_id: идентификатор обновляемого подменю
         update_submenu_data: данные, на которые нужно обновить текущие
-        background_tasks: Объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse
+    Returns: ORJSONResponse
 
     """
 
@@ -184,7 +184,7 @@ async def submenu_patch_method(
     )
 
     if len(updated_submenu) == 0:
-        return JSONResponse(
+        return ORJSONResponse(
             content={'detail': 'no submenu was found for the specified data'},
             status_code=404,
         )
@@ -196,58 +196,45 @@ async def submenu_patch_method(
         target_submenu_id, session=session
     )
 
-    submenu_formatted_dishes = await format_dishes(submenu_dishes)
-    updated_submenu_dict['dishes'] = await apply_discount(submenu_formatted_dishes)
-
-    all_submenus_for_menu_cache_key = target_menu_id + '_submenus'
+    updated_submenu_dict['dishes'] = await format_dishes(submenu_dishes)
 
-    background_tasks.add_task(delete_cache_by_key, all_submenus_for_menu_cache_key)
-    background_tasks.add_task(delete_cache_by_key, target_submenu_id)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    cache_invalidation.write_through(
+        fields={'title': updated_submenu.title, 'description': updated_submenu.description},
+        menu_id=target_menu_id,
+        submenu_id=target_submenu_id,
+    )
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content=updated_submenu_dict, status_code=200)
+    return ORJSONResponse(content=updated_submenu_dict, status_code=200)
 
 
 @router.delete('/{target_menu_id}/submenus/{target_submenu_id}')
 async def submenu_delete_method(
         target_menu_id: str,
         target_submenu_id: str,
-        background_tasks: BackgroundTasks,
+        cache_invalidation: CacheInvalidation = Depends(),
         session: AsyncSession = Depends(get_async_session),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Функция для обработки DELETE запроса по-указанному id.
 
     Args:
         target_menu_id: идентификатор меню, с которым должно быть связанно удаляемое подменю
         target_submenu_id: идентификатор удаляемого подменю
-        background_tasks: объект фоновых задач FastAPI
+        cache_invalidation: кэш, который будет инвалидирован после ответа
         session: сессия подключения к БД.
 
-    Returns: JSONResponse
+    Returns: ORJSONResponse
 
     """
 
-    await delete_linked_submenu_cache(
-        target_menu_id=target_menu_id,
-        target_submenu_id=target_submenu_id,
-        background_tasks=background_tasks,
-        session=session
-    )
-
     await delete_submenu(
         target_submenu_id=target_submenu_id,
         target_menu_id=target_menu_id,
         session=session,
     )
 
-    all_submenus_for_menu_cache_key = target_menu_id + '_submenus'
-
-    background_tasks.add_task(delete_cache_by_key, target_submenu_id)
-    background_tasks.add_task(delete_cache_by_key, all_submenus_for_menu_cache_key)
-    background_tasks.add_task(delete_cache_by_key, target_menu_id)
-    background_tasks.add_task(delete_cache_by_key, 'menus_detail')
-    background_tasks.add_task(delete_cache_by_key, 'table_cache')
+    cache_invalidation.invalidate_namespaces(menu_id=target_menu_id, submenu_id=target_submenu_id)
+    cache_invalidation.delete('table_cache')
 
-    return JSONResponse(content={'status': 'success!'}, status_code=200)
+    return ORJSONResponse(content={'status': 'success!'}, status_code=200)
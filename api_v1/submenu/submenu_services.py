@@ -3,63 +3,59 @@
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
 
-Дата: 10 февраля 2024 | Добавлена функция форматирования списка подменю. Реализовано применение скидки для блюд
-в подменю
+Дата: 17 октября 2026 | Количество блюд берется из выборки, если оно посчитано в SQL
 """
 from typing import Any
 
-from database.database import get_async_session
-from database.database_services import get_dishes_for_submenu
-from dish.dish_utils import apply_discount
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from dish.models import Dish
 from submenu.models import Submenu
 from submenu.submenu_utils import format_dishes
 
 
-async def prepare_submenus_to_response(
-        submenus: list[Submenu],
-        session: AsyncSession = Depends(get_async_session)
-) -> list[dict[Any, Any]]:
+async def prepare_submenus_to_response(submenus: list[Submenu]) -> list[dict[Any, Any]]:
     """
-    Добавляет dishes_count ко всем подменю переданным в списке и преобразует dishes из объектов в json,
-    добавляет скидку к цене блюда, если таковая имеется
+    Добавляет dishes_count ко всем подменю переданным в списке и преобразует dishes из объектов в json
+    с ценой блюда с учетом скидки
 
     :param submenus: Список объектов подменю, которые необходимо отформатировать
-    :param session: сессия подключения к БД
     :return: Список с данными об объектах подменю в формате JSON
     """
 
     submenus_list = []
     for submenu in submenus:
-        prepared_submenu = await prepare_submenu_to_response(submenu=submenu, session=session)
+        prepared_submenu = await prepare_submenu_to_response(submenu=submenu)
         submenus_list.append(prepared_submenu)
 
     return submenus_list
 
 
-async def prepare_submenu_to_response(
-        submenu: Submenu,
-        session: AsyncSession = Depends(get_async_session)
-) -> dict[Any, Any]:
+async def prepare_submenu_to_response(submenu: Submenu) -> dict[Any, Any]:
     """
-    Добавляет dishes_count к определенному подменю и преобразует dishes из объектов в json, добавляет скидку к цене
-    блюда, если таковая имеется
+    Добавляет dishes_count к определенному подменю и преобразует dishes из объектов в json с ценой блюда с учетом
+    скидки. Блюда берутся из Submenu.dishes, загруженных вместе с подменю (lazy='selectin'), без запроса на каждое
+    подменю.
 
     :param submenu: объект подменю
-    :param session: сессия подключения к БД
 
     :return: json объект подменю
     """
 
-    submenu_dishes = await get_dishes_for_submenu(submenu.id, session)
+    return await format_submenu(submenu=submenu, dishes=submenu.dishes)
 
-    submenu_json = await submenu.json()
-    submenu_json['dishes_count'] = len(submenu_dishes)
 
-    submenu_json['dishes'] = await format_dishes(submenu_dishes)
-    dishes_with_discounts = await apply_discount(submenu_json['dishes'])
+async def format_submenu(submenu: Submenu, dishes: list[Dish]) -> dict[Any, Any]:
+    """
+    Преобразует подменю и его блюда в json с количеством блюд и ценой блюда с учетом скидки. Если количество блюд
+    посчитано в выборке (атрибут selected_dishes_count), оно не пересчитывается.
+
+    :param submenu: объект подменю
+    :param dishes: блюда подменю
+    :return: json объект подменю
+    """
+
+    submenu_json = await submenu.json()
+    submenu_json.setdefault('dishes_count', getattr(submenu, 'selected_dishes_count', len(dishes)))
 
-    submenu_json['dishes'] = dishes_with_discounts
+    submenu_json['dishes'] = await format_dishes(dishes)
 
     return submenu_json
@@ -3,12 +3,13 @@
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
 
-Дата: 11 февраля 2024
+Дата: 17 октября 2026 | Прогрев кэша после синхронизации
 """
 
 import asyncio
 import logging
 
+from cache_warmup import run_cache_warmup
 from exceptions import CustomException
 from operations import (
     clear_tables,
@@ -16,7 +17,7 @@ from operations import (
     create_menu_using_data_from_sheets,
     create_submenu_using_data_from_sheets,
 )
-from services import create_cache, delete_cache_by_key, get_cache
+from services import create_cache, delete_cache_by_key, get_cache, get_cache_ttl
 from tasks.tasks import get_sheets_data
 
 logging.basicConfig(filename='data_sync.log', level=logging.INFO)
@@ -100,8 +101,9 @@ async def sync() -> None:
                 logging.info('В таблице ничего не изменилось. Изменения не были внесены!')
             else:
                 await clear_tables()
-                await create_cache(key='table_cache', value=data_values)
+                await create_cache(key='table_cache', value=data_values, ttl=get_cache_ttl('table_cache'))
                 await sync_table(sheets_response=data_values)
+                await run_cache_warmup()
 
                 logging.info('Изменения были внесены!')
 
@@ -111,7 +113,11 @@ async def sync() -> None:
             else:
                 await clear_tables()
 
-                await create_cache(key='table_cache', value=table_data['valueRanges'][0])
+                await create_cache(
+                    key='table_cache',
+                    value=table_data['valueRanges'][0],
+                    ttl=get_cache_ttl('table_cache')
+                )
 
                 logging.info('Изменения были внесены!')
 
@@ -3,14 +3,14 @@
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
 
-Дата: 11 февраля 2024
+Дата: 16 октября 2026 | Скидки сохраняются в БД вместо кэша
 """
 
 from database.database import get_async_session
 from database.database_services import delete_menu, insert_data
-from dish.models import Dish
+from dish.models import Dish, DishDiscount
 from menu.models import Menu
-from services import create_cache, delete_all_cache
+from services import delete_all_cache
 from submenu.models import Submenu
 
 
@@ -90,7 +90,8 @@ async def create_submenu_using_data_from_sheets(submenu_data_from_table: list[st
 
 async def create_dish_using_data_from_sheets(dish_data_from_table: list[str], target_submenu_id: str) -> None:
     """
-    Создает блюдо используя данные из гугл таблицы
+    Создает блюдо используя данные из гугл таблицы. Если в столбце G указана скидка, она сохраняется в таблице
+    dish_discounts.
 
     :param dish_data_from_table: данные о блюде, полученные из sheets, которое нужно создать.
     :param target_submenu_id: uuid созданного ранее подменю, для которого блюдо создается
@@ -116,9 +117,17 @@ async def create_dish_using_data_from_sheets(dish_data_from_table: list[str], ta
                     session=session
                 )
                 target_dish_id = created_dish_dict['id']
-        elif cntr == 6:
-            discount_perc = data
-            discount_cache_key = 'discount_' + target_dish_id
-            await create_cache(key=discount_cache_key, value=discount_perc)
+        elif cntr == 6 and data:
+            discount_data = {
+                'dish_id': target_dish_id,
+                'discount': data.replace(',', '.')
+            }
+
+            async for session in get_async_session():
+                await insert_data(
+                    data_dict=discount_data,
+                    database_model=DishDiscount,
+                    session=session
+                )
 
         cntr += 1
@@ -0,0 +1,102 @@
+"""
+Бенчмарк задержки чтения из кэша (cache hit): новый клиент Redis на каждый вызов против общего пула соединений.
+
+Запуск внутри контейнера приложения:
+    export PYTHONPATH=/fastapi_app/api_v1 && python benchmarks/cache_hit_latency.py
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Клиенты Redis закрываются после замера
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import aioredis
+from config import IS_TEST, REDIS_HOST, TEST_REDIS_HOST
+from redis_tools.tools import close_connection_pool, redis_tools
+from services import get_cache
+
+ITERATIONS = 2000
+BENCHMARK_KEY = 'benchmark_cache_hit'
+BENCHMARK_VALUE = [{'id': str(i), 'title': f'Menu {i}', 'description': 'Description'} for i in range(20)]
+
+
+def get_redis_url() -> str:
+    host = TEST_REDIS_HOST if IS_TEST else REDIS_HOST
+
+    return f'redis://{host}:6379/0'
+
+
+async def close_redis(redis: aioredis.Redis) -> None:
+    """
+    Закрывает клиент вместе с его пулом соединений: иначе каждый клиент оставляет открытый сокет до сборки мусора.
+
+    :param redis: клиент Redis
+    :return: None
+    """
+    await redis.close()
+    await redis.connection_pool.disconnect()
+
+
+async def get_cache_with_fresh_client(key: str) -> list | dict | None:
+    """
+    Воспроизводит прежнее поведение: отдельный клиент Redis на каждое чтение. Клиент закрывается после чтения,
+    поэтому замер включает установку и закрытие соединения, но не накапливает открытые соединения.
+
+    :param key: ключ, по которому нужно получить значение
+    :return: значение из кэша
+    """
+    redis = await aioredis.from_url(get_redis_url())
+
+    try:
+        cache = await redis.get(redis_tools.make_key(key))
+    finally:
+        await close_redis(redis)
+
+    return json.loads(cache) if cache else None
+
+
+async def measure(name: str, get_method: Callable[[str], Awaitable]) -> None:
+    """
+    Замеряет задержку чтения и выводит статистику в миллисекундах.
+
+    :param name: название замера
+    :param get_method: функция чтения из кэша
+    :return: None
+    """
+    latencies = []
+
+    for _ in range(ITERATIONS):
+        started_at = time.perf_counter()
+        await get_method(BENCHMARK_KEY)
+        latencies.append((time.perf_counter() - started_at) * 1000)
+
+    latencies.sort()
+
+    print(
+        f'{name:<20} mean={statistics.mean(latencies):.3f}ms '
+        f'p50={latencies[len(latencies) // 2]:.3f}ms '
+        f'p99={latencies[int(len(latencies) * 0.99)]:.3f}ms'
+    )
+
+
+async def main() -> None:
+    redis = await aioredis.from_url(get_redis_url())
+
+    try:
+        await redis.set(redis_tools.make_key(BENCHMARK_KEY), json.dumps(BENCHMARK_VALUE))
+
+        await measure('fresh client', get_cache_with_fresh_client)
+        await measure('pooled client', get_cache)
+
+        await redis.delete(redis_tools.make_key(BENCHMARK_KEY))
+    finally:
+        await close_redis(redis)
+        await close_connection_pool()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
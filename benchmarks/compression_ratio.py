@@ -0,0 +1,81 @@
+"""
+Бенчмарк сжатия значений кэша zstd: степень сжатия и затраты CPU на сжатие и распаковку для дерева /menus/detail
+(1000 блюд) и для table_cache (гугл таблица).
+
+Данные генерируются в памяти, БД и Redis не нужны. Запуск:
+    export PYTHONPATH=/fastapi_app/api_v1 && python benchmarks/compression_ratio.py
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 16 октября 2026
+"""
+
+import time
+
+import zstandard
+from serialization import dumps
+from serialization_speed import generate_menus_detail
+
+ITERATIONS = 200
+LEVELS = (1, 3, 6, 9)
+
+
+def generate_table_cache(menus_count: int = 10, submenus_per_menu: int = 10, dishes_per_submenu: int = 10) -> list:
+    """
+    Формирует строки гугл таблицы в том виде, в котором они сохраняются в table_cache.
+
+    :return: список строк таблицы
+    """
+    rows = []
+
+    for menu_index in range(menus_count):
+        rows.append([str(menu_index + 1), f'Menu {menu_index}', 'Benchmark menu description'])
+
+        for submenu_index in range(submenus_per_menu):
+            rows.append(['', str(submenu_index + 1), f'Submenu {submenu_index}', 'Benchmark submenu description'])
+
+            for dish_index in range(dishes_per_submenu):
+                rows.append([
+                    '', '', str(dish_index + 1), f'Dish {dish_index}', 'Benchmark dish description', '123.45', '10'
+                ])
+
+    return rows
+
+
+def measure(name: str, value: bytes) -> None:
+    """
+    Выводит степень сжатия и среднее время сжатия и распаковки значения для каждого уровня zstd.
+
+    :param name: название значения
+    :param value: строка JSON в байтах
+    :return: None
+    """
+    print(f'{name}: {len(value) / 1024:.1f} KiB')
+
+    for level in LEVELS:
+        compressor = zstandard.ZstdCompressor(level=level)
+        decompressor = zstandard.ZstdDecompressor()
+
+        started_at = time.perf_counter()
+        for _ in range(ITERATIONS):
+            compressed_value = compressor.compress(value)
+        compress_duration = (time.perf_counter() - started_at) * 1000 / ITERATIONS
+
+        started_at = time.perf_counter()
+        for _ in range(ITERATIONS):
+            decompressor.decompress(compressed_value)
+        decompress_duration = (time.perf_counter() - started_at) * 1000 / ITERATIONS
+
+        print(
+            f'  level={level} size={len(compressed_value) / 1024:.1f} KiB '
+            f'ratio={len(value) / len(compressed_value):.2f} '
+            f'compress={compress_duration:.3f}ms decompress={decompress_duration:.3f}ms'
+        )
+
+
+def main() -> None:
+    measure('menus_detail', dumps(generate_menus_detail(native=True)))
+    measure('table_cache', dumps(generate_table_cache()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Бенчмарк пропускной способности /api/v1/menus/detail при попадании в кэш на дереве из 1000 блюд
+(10 меню x 10 подменю x 10 блюд).
+
+Дополнительно сравнивается стоимость формирования ответа: тело из кэша как есть против прежнего пути
+json.loads -> валидация/кодирование FastAPI -> повторная сериализация.
+
+Бенчмарк создает и удаляет дерево через API, поэтому, как и тесты, работает с тестовыми БД (TEST_DB_*) и Redis
+(TEST_REDIS_HOST) и не запускается без IS_TEST.
+
+Запуск внутри контейнера тестов:
+    export PYTHONPATH=/fastapi_app/api_v1 && python benchmarks/menus_detail_throughput.py
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Запуск на тестовых БД и Redis
+"""
+
+import asyncio
+import json
+import time
+from typing import AsyncGenerator
+
+from config import (
+    IS_TEST,
+    TEST_DB_HOST,
+    TEST_DB_NAME,
+    TEST_DB_PASSWORD,
+    TEST_DB_PORT,
+    TEST_DB_USER,
+)
+from database.database import get_async_read_session, get_async_session
+from dish.models import Dish
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+from main import app
+from services import get_raw_cache, get_versioned_cache_key, make_json_response
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+DATABASE_URL = f'postgresql+asyncpg://{TEST_DB_USER}:{TEST_DB_PASSWORD}@{TEST_DB_HOST}:{TEST_DB_PORT}/{TEST_DB_NAME}'
+
+benchmark_engine = create_async_engine(DATABASE_URL)
+benchmark_session_maker = sessionmaker(benchmark_engine, expire_on_commit=False, class_=AsyncSession)
+
+MENUS_COUNT = 10
+SUBMENUS_PER_MENU = 10
+DISHES_PER_SUBMENU = 10
+
+REQUESTS = 2000
+CONCURRENCY = 20
+
+
+async def get_benchmark_session() -> AsyncGenerator[AsyncSession, None]:
+    async with benchmark_session_maker() as session:
+        yield session
+
+
+app.dependency_overrides[get_async_session] = get_benchmark_session
+app.dependency_overrides[get_async_read_session] = get_benchmark_session
+
+
+async def populate(client: AsyncClient) -> list[str]:
+    """
+    Создает дерево меню через API.
+
+    :param client: http клиент приложения
+    :return: список id созданных меню
+    """
+    menu_ids = []
+
+    for menu_index in range(MENUS_COUNT):
+        menu = await client.post(
+            '/api/v1/menus',
+            json={'title': f'Menu {menu_index}', 'description': 'Benchmark menu'}
+        )
+        menu_id = menu.json()['id']
+        menu_ids.append(menu_id)
+
+        for submenu_index in range(SUBMENUS_PER_MENU):
+            submenu = await client.post(
+                f'/api/v1/menus/{menu_id}/submenus',
+                json={'title': f'Submenu {menu_index}.{submenu_index}', 'description': 'Benchmark submenu'}
+            )
+            submenu_id = submenu.json()['id']
+
+            for dish_index in range(DISHES_PER_SUBMENU):
+                await client.post(
+                    f'/api/v1/menus/{menu_id}/submenus/{submenu_id}/dishes',
+                    json={
+                        'title': f'Dish {menu_index}.{submenu_index}.{dish_index}',
+                        'description': 'Benchmark dish',
+                        'price': '123.45',
+                    }
+                )
+
+    return menu_ids
+
+
+async def measure_throughput(client: AsyncClient) -> None:
+    """
+    Выполняет REQUESTS запросов к /api/v1/menus/detail в CONCURRENCY потоков и выводит количество запросов в секунду.
+
+    :param client: http клиент приложения
+    :return: None
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    for _ in range(REQUESTS):
+        queue.put_nowait(None)
+
+    async def worker() -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            response = await client.get('/api/v1/menus/detail')
+            assert response.status_code == 200
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    duration = time.perf_counter() - started_at
+
+    print(f'/menus/detail cache hit: {REQUESTS / duration:.0f} req/s ({duration * 1000 / REQUESTS:.3f}ms per request)')
+
+
+def measure_response_building(cache: bytes) -> None:
+    """
+    Сравнивает формирование ответа из тела в кэше с прежним путем через десериализацию.
+
+    :param cache: тело ответа из кэша
+    :return: None
+    """
+    iterations = 200
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        make_json_response(content=cache).body
+    raw_duration = (time.perf_counter() - started_at) * 1000 / iterations
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        JSONResponse(content=jsonable_encoder(json.loads(cache))).body
+    decoded_duration = (time.perf_counter() - started_at) * 1000 / iterations
+
+    print(f'payload {len(cache) / 1024:.1f} KiB: raw={raw_duration:.3f}ms decode+encode={decoded_duration:.3f}ms')
+
+
+async def main() -> None:
+    if not IS_TEST:
+        raise SystemExit('Бенчмарк создает и удаляет записи, поэтому работает только с тестовыми БД и Redis (IS_TEST)')
+
+    async with benchmark_engine.begin() as conn:
+        await conn.run_sync(Dish.metadata.create_all)
+
+    async with AsyncClient(app=app, base_url='http://benchmark') as client:
+        menu_ids = await populate(client)
+
+        try:
+            # Прогрев кэша.
+            await client.get('/api/v1/menus/detail')
+
+            await measure_throughput(client)
+
+            cache = await get_raw_cache(key=await get_versioned_cache_key('menus_detail'))
+            measure_response_building(cache)
+        finally:
+            for menu_id in menu_ids:
+                await client.delete(f'/api/v1/menus/{menu_id}')
+
+    await benchmark_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
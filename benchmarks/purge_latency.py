@@ -0,0 +1,112 @@
+"""
+Бенчмарк влияния очистки всего кэша на другие запросы к Redis: одна команда DEL со всеми ключами против порционной
+очистки SCAN + UNLINK.
+
+Во время очистки отдельный клиент непрерывно выполняет PING и замеряет его задержку.
+
+Запуск внутри контейнера приложения:
+    export PYTHONPATH=/fastapi_app/api_v1 && python benchmarks/purge_latency.py
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Клиенты Redis закрываются после замера
+"""
+
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import aioredis
+from config import IS_TEST, REDIS_HOST, TEST_REDIS_HOST
+from redis_tools.tools import RedisTools, close_connection_pool
+
+KEYS_COUNT = 200_000
+BENCHMARK_VALUE = [{'id': str(i), 'title': f'Menu {i}', 'description': 'Description'} for i in range(20)]
+
+benchmark_redis_tools = RedisTools(key_prefix='benchmark_purge:')
+
+
+def get_redis_url() -> str:
+    host = TEST_REDIS_HOST if IS_TEST else REDIS_HOST
+
+    return f'redis://{host}:6379/0'
+
+
+async def close_redis(redis: aioredis.Redis) -> None:
+    """
+    Закрывает клиент вместе с его пулом соединений.
+
+    :param redis: клиент Redis
+    :return: None
+    """
+    await redis.close()
+    await redis.connection_pool.disconnect()
+
+
+async def populate() -> list[str]:
+    """
+    Заполняет Redis ключами с префиксом бенчмарка.
+
+    :return: список ключей с префиксом
+    """
+    keys = [f'key_{i}' for i in range(KEYS_COUNT)]
+
+    for start in range(0, KEYS_COUNT, 10_000):
+        await benchmark_redis_tools.set_pairs(pairs={key: BENCHMARK_VALUE for key in keys[start:start + 10_000]})
+
+    return [benchmark_redis_tools.make_key(key) for key in keys]
+
+
+async def measure(name: str, purge_method: Callable[[], Awaitable]) -> None:
+    """
+    Выполняет очистку и параллельно замеряет задержку PING, выводит статистику в миллисекундах.
+
+    :param name: название замера
+    :param purge_method: функция очистки
+    :return: None
+    """
+    redis = await aioredis.from_url(get_redis_url())
+
+    latencies = []
+
+    try:
+        purge_task = asyncio.create_task(purge_method())
+
+        started_at = time.perf_counter()
+
+        while not purge_task.done():
+            ping_started_at = time.perf_counter()
+            await redis.ping()
+            latencies.append((time.perf_counter() - ping_started_at) * 1000)
+
+        await purge_task
+        duration = (time.perf_counter() - started_at) * 1000
+    finally:
+        await close_redis(redis)
+
+    latencies.sort()
+
+    print(
+        f'{name:<20} purge={duration:.1f}ms pings={len(latencies)} '
+        f'p50={latencies[len(latencies) // 2]:.3f}ms '
+        f'max={latencies[-1]:.3f}ms '
+        f'mean={statistics.mean(latencies):.3f}ms'
+    )
+
+
+async def main() -> None:
+    redis = await aioredis.from_url(get_redis_url())
+
+    try:
+        keys = await populate()
+        await measure('single DEL', lambda: redis.delete(*keys))
+
+        await populate()
+        await measure('SCAN + UNLINK', benchmark_redis_tools.invalidate_all_cache)
+    finally:
+        await close_redis(redis)
+        await close_connection_pool()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
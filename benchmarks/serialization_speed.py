@@ -0,0 +1,107 @@
+"""
+Бенчмарк сериализации большого ответа /menus/detail: стандартный json (с приведением UUID и Decimal к строкам, как
+было в методах json() моделей) против orjson.
+
+Данные генерируются в памяти, БД и Redis не нужны. Запуск:
+    export PYTHONPATH=/fastapi_app/api_v1 && python benchmarks/serialization_speed.py
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 16 октября 2026
+"""
+
+import json
+import time
+import uuid
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from serialization import ORJSONResponse, dumps, loads
+
+MENUS_COUNT = 10
+SUBMENUS_PER_MENU = 10
+DISHES_PER_SUBMENU = 10
+ITERATIONS = 200
+
+
+def generate_menus_detail(native: bool) -> list[dict[Any, Any]]:
+    """
+    Формирует дерево меню в формате ответа /menus/detail.
+
+    :param native: True - UUID и Decimal как есть, False - приведенные к строкам
+    :return: список меню
+    """
+    convert: Callable[[Any], Any] = (lambda value: value) if native else str
+    menus = []
+
+    for menu_index in range(MENUS_COUNT):
+        menu_id = uuid.uuid4()
+        submenus = []
+
+        for submenu_index in range(SUBMENUS_PER_MENU):
+            submenu_id = uuid.uuid4()
+            dishes = [
+                {
+                    'id': convert(uuid.uuid4()),
+                    'title': f'Dish {menu_index}.{submenu_index}.{dish_index}',
+                    'description': 'Benchmark dish description',
+                    'price': convert(Decimal('123.45')),
+                    'submenu_id': convert(submenu_id),
+                }
+                for dish_index in range(DISHES_PER_SUBMENU)
+            ]
+            submenus.append({
+                'id': convert(submenu_id),
+                'title': f'Submenu {menu_index}.{submenu_index}',
+                'description': 'Benchmark submenu description',
+                'dishes': dishes,
+                'dishes_count': len(dishes),
+                'menu_id': convert(menu_id),
+            })
+
+        menus.append({
+            'id': convert(menu_id),
+            'title': f'Menu {menu_index}',
+            'description': 'Benchmark menu description',
+            'submenus': submenus,
+        })
+
+    return menus
+
+
+def measure(name: str, method: Callable[[], Any]) -> None:
+    """
+    Замеряет среднее время выполнения в миллисекундах.
+
+    :param name: название замера
+    :param method: замеряемая функция
+    :return: None
+    """
+    started_at = time.perf_counter()
+
+    for _ in range(ITERATIONS):
+        method()
+
+    print(f'{name:<32} {(time.perf_counter() - started_at) * 1000 / ITERATIONS:.3f}ms')
+
+
+def main() -> None:
+    menus_with_strings = generate_menus_detail(native=False)
+    menus_native = generate_menus_detail(native=True)
+
+    stdlib_payload = json.dumps(menus_with_strings)
+    orjson_payload = dumps(menus_native)
+
+    print(f'payload: {len(stdlib_payload) / 1024:.1f} KiB (json), {len(orjson_payload) / 1024:.1f} KiB (orjson)')
+
+    measure('json.dumps', lambda: json.dumps(menus_with_strings))
+    measure('orjson dumps', lambda: dumps(menus_native))
+    measure('json.loads', lambda: json.loads(stdlib_payload))
+    measure('orjson loads', lambda: loads(orjson_payload))
+    measure('JSONResponse', lambda: JSONResponse(content=menus_with_strings))
+    measure('ORJSONResponse', lambda: ORJSONResponse(content=menus_native))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,20 @@ export ENV_FILE=/fastapi_app/.env-example
 
 sleep 5
 
-mkdir -p alembic/versions
-alembic revision --autogenerate -m "initial"
+# Базы, развернутые до появления цепочки миграций, хранят в alembic_version id ревизии, которую app.sh генерировал при
+# запуске: ее нет в репозитории, и alembic current завершается ошибкой. Таблицы таких баз соответствуют начальной
+# ревизии, поэтому база помечается ею, а остальные ревизии применяет upgrade head.
+if ! alembic current > /dev/null 2>&1; then
+    alembic stamp --purge 2b6f0c1d9a41
+fi
+
 alembic upgrade head
 
-gunicorn main:app --worker-class uvicorn.workers.UvicornWorker --bind=0.0.0.0:8000
+# Воркеры gunicorn пишут метрики Prometheus в файлы общего каталога, и /metrics отдает значения всех воркеров.
+# Каталог очищается при запуске, чтобы не учитывать значения предыдущего запуска.
+export PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus_multiproc
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+gunicorn main:app --config /fastapi_app/docker/gunicorn_conf.py --worker-class uvicorn.workers.UvicornWorker \
+    --bind=0.0.0.0:8000
@@ -0,0 +1,21 @@
+"""
+Настройки gunicorn для контейнера приложения.
+
+Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
+Дата: 17 октября 2026 | Метрики всех воркеров gunicorn
+"""
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker) -> None:
+    """
+    Удаляет файлы метрик-gauge завершившегося воркера из PROMETHEUS_MULTIPROC_DIR, чтобы /metrics не учитывал его
+    выданные соединения и заполненность пула.
+
+    :param server: арбитр gunicorn
+    :param worker: завершившийся воркер
+    :return: None
+    """
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -3,7 +3,7 @@
 тестовых HTTP запросов
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 27 января 2024
+Дата: 17 октября 2026 | Сессия для чтения тоже подключается к тестовой БД
 """
 
 from typing import AsyncGenerator
@@ -16,7 +16,7 @@ from config import (
     TEST_DB_PORT,
     TEST_DB_USER,
 )
-from database.database import get_async_session
+from database.database import get_async_read_session, get_async_session
 from dish.models import Dish
 from httpx import AsyncClient
 from main import app
@@ -39,6 +39,7 @@ async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 app.dependency_overrides[get_async_session] = override_get_async_session
+app.dependency_overrides[get_async_read_session] = override_get_async_session
 
 
 @pytest.fixture(autouse=True, scope='session')
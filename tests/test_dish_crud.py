@@ -2,7 +2,7 @@
 Модуль для тестирования CRUD операций, связанных с блюдами.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 31 января 2024 | Добавлены тесты для сравнения ответа и данных из БД
+Дата: 17 октября 2026 | Условный GET запрос блюда
 """
 
 import pytest
@@ -26,6 +26,7 @@ from tests_utils.fixtures import (
 )
 from tests_utils.internal_tests import (
     assert_response,
+    conditional_get_internal_test,
     delete_object_internal_test,
     get_object_when_table_is_empty_internal_test,
     get_objects_when_table_is_not_empty_internal_test,
@@ -38,8 +39,10 @@ from tests_utils.test_data import (
     DISH_PRICE_TO_UPDATE,
     DISH_TITLE_VALUE_TO_CREATE,
     DISH_TITLE_VALUE_TO_UPDATE,
+    MENU_DESCRIPTION_VALUE_TO_CREATE,
+    MENU_TITLE_VALUE_TO_CREATE,
 )
-from tests_utils.utils import get_created_object_attribute
+from tests_utils.utils import get_created_object_attribute, to_response_json
 
 
 class TestCreateMenu:
@@ -104,6 +107,74 @@ class TestCreateSubmenu:
         assert submenus_data[0] == response.json()
 
 
+class TestCreateDishInSubmenuOfAnotherMenu:
+    @pytest.mark.asyncio
+    async def test_create_dish_when_submenu_is_not_linked_to_menu(
+            self,
+            ac: AsyncClient,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование создания блюда в подменю, которое привязано к другому меню.
+
+        Тест проходит успешно, если:
+            1. Код ответа 404.
+            2. Тело ответа сообщает, что подменю не привязано к меню.
+            3. Блюдо не создано.
+
+        Args:
+            ac: клиент для асинхронных HTTP запросов.
+            create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню,
+            create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю,
+
+        Returns:
+            None
+        """
+
+        target_submenu_id = get_created_object_attribute(
+            response=create_submenu_using_post_method_fixture, attribute='id'
+        )
+
+        # Создаем второе меню, к которому подменю не привязано.
+        another_menu_response = await ac.post(
+            url=menu_router.reverse(router_name='menu_base_url'),
+            json={
+                'title': MENU_TITLE_VALUE_TO_CREATE,
+                'description': MENU_DESCRIPTION_VALUE_TO_CREATE,
+            },
+        )
+        another_menu_id = get_created_object_attribute(response=another_menu_response, attribute='id')
+
+        url = dish_router.reverse(
+            router_name='dish_base_url',
+            target_menu_id=another_menu_id,
+            target_submenu_id=target_submenu_id
+        )
+
+        response = await ac.post(
+            url=url,
+            json={
+                'title': DISH_TITLE_VALUE_TO_CREATE,
+                'description': DISH_DESCRIPTION_VALUE_TO_CREATE,
+                'price': float(DISH_PRICE_TO_CREATE),
+            },
+        )
+
+        await ac.delete(url=f'/api/v1/menus/{another_menu_id}')
+
+        assert_response(
+            response=response,
+            expected_status_code=404,
+            expected_data={
+                'detail': 'the menu object with the identifier you passed has no connection with '
+                          'the submenu object whose identifier you passed'
+            },
+        )
+
+        assert await get_dish_by_index(index=0) == []
+
+
 class TestGetDishesFromEmptyTable:
     @pytest.mark.asyncio
     async def test_get_dishes_method_when_table_is_empty(
@@ -305,11 +376,55 @@ class TestGetSpecificDish:
         result = await get_specific_dish_data_from_db()
         dish_data = result.scalars().all()
 
-        dish_data_json = await dish_data[0].json()
+        dish_data_json = to_response_json(await dish_data[0].json())
 
         assert dish_data_json == response.json()
 
 
+class TestConditionalGetSpecificDish:
+    @pytest.mark.asyncio
+    async def test_get_specific_dish_method_with_if_none_match(
+            self,
+            ac: AsyncClient,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+            create_dish_using_post_method_fixture: create_dish_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование условного GET запроса определенного блюда.
+
+        Args:
+            ac: клиент для асинхронных HTTP запросов,
+            create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню,
+            create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю,
+            create_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание блюда,
+
+        Returns:
+            None
+        """
+
+        target_menu_id = get_created_object_attribute(
+            response=create_menu_using_post_method_fixture, attribute='id'
+        )
+
+        target_submenu_id = get_created_object_attribute(
+            response=create_submenu_using_post_method_fixture, attribute='id'
+        )
+
+        target_dish_id = get_created_object_attribute(
+            response=create_dish_using_post_method_fixture, attribute='id'
+        )
+
+        url = dish_router.reverse(
+            router_name='dish_base_url',
+            target_menu_id=target_menu_id,
+            target_submenu_id=target_submenu_id,
+            target_dish_id=target_dish_id
+        )
+
+        await conditional_get_internal_test(ac=ac, url=url)
+
+
 class TestUpdateDish:
     @pytest.mark.asyncio
     async def test_update_dish_using_patch_method(
@@ -456,7 +571,7 @@ class TestGetSpecificDishAfterUpdate:
         result = await get_specific_dish_data_from_db()
         dish_data = result.scalars().all()
 
-        dish_data_json = await dish_data[0].json()
+        dish_data_json = to_response_json(await dish_data[0].json())
 
         assert dish_data_json == response.json()
 
@@ -2,7 +2,7 @@
 Модуль для тестирования CRUD операций, связанных с меню.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 31 января 2024 | Добавлены тесты для сравнения ответа и данных из БД
+Дата: 17 октября 2026 | Добавлен тест условного GET запроса
 """
 import pytest
 from httpx import AsyncClient
@@ -15,6 +15,7 @@ from tests_services.menu_services_for_tests import (
 from tests_utils.fixtures import create_menu_using_post_method_fixture
 from tests_utils.internal_tests import (
     assert_response,
+    conditional_get_internal_test,
     delete_object_internal_test,
     get_object_when_table_is_empty_internal_test,
     get_objects_when_table_is_not_empty_internal_test,
@@ -110,6 +111,24 @@ class TestGetMenusFromTableWithData:
         assert menu_data == response.json()
 
 
+class TestConditionalGetMenus:
+    @pytest.mark.asyncio
+    async def test_get_menus_method_with_if_none_match(self, ac: AsyncClient) -> None:
+        """
+        Тестирование условного GET запроса всех записей из таблицы menus.
+
+        Args:
+            ac: клиент для асинхронных HTTP запросов.
+
+        Returns:
+            None
+        """
+
+        url = router.reverse(router_name='menu_base_url')
+
+        await conditional_get_internal_test(ac=ac, url=url)
+
+
 class TestGetSpecificMenu:
     @pytest.mark.asyncio
     async def test_get_specific_menu_method(
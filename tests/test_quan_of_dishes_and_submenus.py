@@ -2,7 +2,7 @@
 Модуль для тестирования сценария проверки кол-ва блюд и подменю в меню.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 08 февраля 2024 | Добавлено тестирование всех меню со всеми связанными подменю и со всеми связанными блюдами
+Дата: 17 октября 2026 | Количество запросов выборки подменю не зависит от их числа
 """
 
 import pytest
@@ -13,12 +13,15 @@ from submenu.router import router as submenu_router
 from submenu.submenu_utils import format_dishes
 from tests_services.dish_services_for_tests import get_dish_by_index
 from tests_services.menu_services_for_tests import (
+    count_menus_detail_queries,
     get_all_menus_data,
     get_all_menus_detail_data,
+    get_all_menus_detail_json_data,
     get_menu_data_from_db_with_counters,
     get_menu_data_from_db_without_counters,
 )
 from tests_services.submenu_services_for_tests import (
+    count_submenus_queries,
     get_specific_submenu_data_from_db,
     get_submenus_data_from_db,
 )
@@ -30,6 +33,7 @@ from tests_utils.fixtures import (
 )
 from tests_utils.internal_tests import (
     assert_response,
+    conditional_get_internal_test,
     delete_object_internal_test,
     get_object_when_table_is_empty_internal_test,
 )
@@ -45,7 +49,7 @@ from tests_utils.test_data import (
     SUBMENU_DESCRIPTION_VALUE_TO_CREATE,
     SUBMENU_TITLE_VALUE_TO_CREATE,
 )
-from tests_utils.utils import get_created_object_attribute
+from tests_utils.utils import get_created_object_attribute, to_response_json
 
 
 class TestCreateMenu:
@@ -239,6 +243,130 @@ class TestGetMenusDetail:
         assert response.json() == menus_detail_json_data
 
 
+class TestConditionalGetMenusDetail:
+    @pytest.mark.asyncio
+    async def test_get_menus_detail_with_if_none_match(
+            self,
+            ac: AsyncClient,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+            create_dish_using_post_method_fixture: create_dish_using_post_method_fixture,
+            create_second_dish_using_post_method_fixture: create_second_dish_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование условного GET запроса всех меню со всеми связанными подменю и блюдами.
+
+        :param ac: клиент для асинхронных HTTP запросов
+        :param create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню
+        :param create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю
+        :param create_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание 1-го блюда
+        :param create_second_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание
+                                                             2-го блюда
+        :return: None
+        """
+
+        await conditional_get_internal_test(ac=ac, url='/api/v1/menus/detail')
+
+
+class TestMenusDetailQueryCount:
+    @pytest.mark.asyncio
+    async def test_menus_detail_query_count(
+            self,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+            create_dish_using_post_method_fixture: create_dish_using_post_method_fixture,
+            create_second_dish_using_post_method_fixture: create_second_dish_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование количества запросов к БД при сборке всех меню со всеми связанными подменю и блюдами.
+
+        Тест проходит успешно, если дерево меню выбрано тремя запросами (меню, подменю, блюда): количество запросов не
+        зависит от количества подменю.
+
+        :param create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню
+        :param create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю
+        :param create_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание 1-го блюда
+        :param create_second_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание
+                                                             2-го блюда
+        :return: None
+        """
+
+        assert await count_menus_detail_queries() == 3
+
+
+class TestSubmenusQueryCount:
+    @pytest.mark.asyncio
+    async def test_submenus_query_count(
+            self,
+            ac: AsyncClient,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+            create_dish_using_post_method_fixture: create_dish_using_post_method_fixture,
+            create_second_dish_using_post_method_fixture: create_second_dish_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование количества запросов к БД при выборке всех подменю меню.
+
+        Тест проходит успешно, если подменю выбраны двумя запросами (подменю с количеством блюд, блюда) и после
+        добавления еще одного подменю количество запросов не меняется.
+
+        :param ac: клиент для асинхронных HTTP запросов
+        :param create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню
+        :param create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю
+        :param create_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание 1-го блюда
+        :param create_second_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание
+                                                             2-го блюда
+        :return: None
+        """
+
+        target_menu_id = get_created_object_attribute(
+            response=create_menu_using_post_method_fixture, attribute='id'
+        )
+
+        assert await count_submenus_queries(target_menu_id=target_menu_id) == 2
+
+        url = submenu_router.reverse(router_name='submenu_base_url', target_menu_id=target_menu_id)
+
+        second_submenu_response = await ac.post(
+            url=url,
+            json={
+                'title': SUBMENU_TITLE_VALUE_TO_CREATE,
+                'description': SUBMENU_DESCRIPTION_VALUE_TO_CREATE,
+            },
+        )
+        second_submenu_id = get_created_object_attribute(response=second_submenu_response, attribute='id')
+
+        try:
+            assert await count_submenus_queries(target_menu_id=target_menu_id) == 2
+        finally:
+            await ac.delete(url=f'{url}/{second_submenu_id}')
+
+
+class TestMenusDetailSqlJsonRendering:
+    @pytest.mark.asyncio
+    async def test_menus_detail_sql_json_rendering(
+            self,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+            create_dish_using_post_method_fixture: create_dish_using_post_method_fixture,
+            create_second_dish_using_post_method_fixture: create_second_dish_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование сборки ответа GET /menus/detail в Postgres (SQL_JSON_RENDERING).
+
+        Тест проходит успешно, если документ, собранный Postgres, совпадает с ответом, собранным из объектов моделей.
+
+        :param create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню
+        :param create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю
+        :param create_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание 1-го блюда
+        :param create_second_dish_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание
+                                                             2-го блюда
+        :return: None
+        """
+
+        assert await get_all_menus_detail_json_data() == await get_all_menus_detail_data()
+
+
 class TestGetSpecificMenu:
     @pytest.mark.asyncio
     async def test_get_specific_menu_from_check_quan_of_dishes_and_submenus_method(
@@ -385,7 +513,7 @@ class TestGetSpecificSubmenu:
         submenus_data_json = await submenus_data.json()
         submenus_data_json['dishes'] = await format_dishes(submenus_data_json['dishes'])
 
-        assert submenus_data_json == response.json()
+        assert to_response_json(submenus_data_json) == response.json()
 
 
 class TestDeleteSubmenu:
@@ -2,7 +2,7 @@
 Модуль для тестирования CRUD операций, связанных с подменю.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 31 января 2024 | Добавлены тесты для сравнения ответа и данных из БД
+Дата: 17 октября 2026 | Условный GET запрос списка подменю
 """
 
 import pytest
@@ -23,6 +23,7 @@ from tests_utils.fixtures import (
 )
 from tests_utils.internal_tests import (
     assert_response,
+    conditional_get_internal_test,
     delete_object_internal_test,
     get_object_when_table_is_empty_internal_test,
     get_objects_when_table_is_not_empty_internal_test,
@@ -34,7 +35,7 @@ from tests_utils.test_data import (
     SUBMENU_TITLE_VALUE_TO_CREATE,
     SUBMENU_TITLE_VALUE_TO_UPDATE,
 )
-from tests_utils.utils import get_created_object_attribute
+from tests_utils.utils import get_created_object_attribute, to_response_json
 
 
 class TestCreateMenu:
@@ -182,6 +183,38 @@ class GetSubmenusFromTableWithData:
         assert submenus_data == response.json()
 
 
+class TestConditionalGetSubmenus:
+    @pytest.mark.asyncio
+    async def test_get_submenus_method_with_if_none_match(
+            self,
+            ac: AsyncClient,
+            create_menu_using_post_method_fixture: create_menu_using_post_method_fixture,
+            create_submenu_using_post_method_fixture: create_submenu_using_post_method_fixture,
+    ) -> None:
+        """
+        Тестирование условного GET запроса всех подменю меню.
+
+        Args:
+            ac: клиент для асинхронных HTTP запросов,
+            create_menu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание меню,
+            create_submenu_using_post_method_fixture: фикстура с ответом сервера на POST запрос на создание подменю,
+
+        Returns:
+            None
+        """
+
+        target_menu_id = get_created_object_attribute(
+            response=create_menu_using_post_method_fixture, attribute='id'
+        )
+
+        url = submenu_router.reverse(
+            router_name='submenu_base_url',
+            target_menu_id=target_menu_id
+        )
+
+        await conditional_get_internal_test(ac=ac, url=url)
+
+
 class TestGetSpecificSubmenu:
     @pytest.mark.asyncio
     async def test_get_specific_submenu_method(
@@ -240,7 +273,7 @@ class TestGetSpecificSubmenu:
 
         # Проверяем, чтобы данные, которые отдал сервер соответствовали данным в БД.
         submenus_data = await get_specific_submenu_data_from_db()
-        submenus_data_json = await submenus_data.json()
+        submenus_data_json = to_response_json(await submenus_data.json())
         assert submenus_data_json == response.json()
 
 
@@ -368,7 +401,7 @@ class TestGetSpecificSubmenuAfterUpdate:
 
         # Проверяем, чтобы данные, которые отдал сервер соответствовали данным в БД.
         submenus_data = await get_specific_submenu_data_from_db()
-        submenus_json_data = await submenus_data.json()
+        submenus_json_data = to_response_json(await submenus_data.json())
         assert submenus_json_data == response.json()
 
 
@@ -14,6 +14,7 @@ from database.database_services import (
     select_specific_dish,
 )
 from dish.models import Dish
+from tests_utils.utils import to_response_json
 
 
 async def select_dishes() -> list[Dish]:
@@ -62,7 +63,7 @@ async def get_dish_by_index(index: int) -> list[dict[Any, Any]] | list[Any]:
 
     try:
         dishes_json = await dishes[index].json()
-        return [dishes_json]
+        return [to_response_json(dishes_json)]
     except IndexError:
         return []
 
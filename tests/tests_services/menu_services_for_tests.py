@@ -2,17 +2,23 @@
 Модуль с операциями взаимодействия с БД, которые касаются тестов для меню.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 08 февраля 2024 | Добавлена выборка всех меню со всеми связанными подменю и со всеми связанными блюдами из БД
+Дата: 17 октября 2026 | Подсчет SQL запросов вынесен в count_queries
 """
+from collections.abc import Awaitable, Callable
 from typing import Any
 
-from conftest import async_session_maker
+from conftest import async_session_maker, test_engine
 from database.database_services import (
     select_all_menus,
     select_all_menus_detail,
+    select_all_menus_detail_json,
     select_specific_menu,
 )
 from menu.menu_utils import format_detailed_menus
+from serialization import loads
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from tests_utils.utils import to_response_json
 
 
 async def get_all_menus_detail_data() -> list[dict[Any, Any]]:
@@ -24,9 +30,61 @@ async def get_all_menus_detail_data() -> list[dict[Any, Any]]:
 
     async with async_session_maker() as session:
         menus_data = await select_all_menus_detail(session=session)
-        menus_json = await format_detailed_menus(menus=menus_data, session=session)
+        menus_json = await format_detailed_menus(menus=menus_data)
 
-    return menus_json
+    return to_response_json(menus_json)
+
+
+async def get_all_menus_detail_json_data() -> list[dict[Any, Any]]:
+    """
+    Выборка всех меню со связанными подменю и блюдами в виде документа JSON, собранного Postgres
+
+    :return: список со всеми меню с отображением привязанных подменю и блюд
+    """
+
+    async with async_session_maker() as session:
+        menus_json = await select_all_menus_detail_json(session=session)
+
+    return loads(menus_json)
+
+
+async def count_queries(run: Callable[[AsyncSession], Awaitable[Any]]) -> int:
+    """
+    Выполняет функцию в новой сессии и считает SQL запросы, отправленные ею в БД
+
+    :param run: функция, которая получает сессию подключения к БД
+    :return: количество запросов
+    """
+
+    statements = []
+
+    def on_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, 'before_cursor_execute', on_execute)
+
+    try:
+        async with async_session_maker() as session:
+            await run(session)
+    finally:
+        event.remove(test_engine.sync_engine, 'before_cursor_execute', on_execute)
+
+    return len(statements)
+
+
+async def count_menus_detail_queries() -> int:
+    """
+    Выполняет выборку и форматирование всех меню со связанными подменю и блюдами так же, как GET /menus/detail, и
+    считает SQL запросы, отправленные в БД
+
+    :return: количество запросов
+    """
+
+    async def select_menus_detail(session: AsyncSession) -> None:
+        menus_data = await select_all_menus_detail(session=session)
+        await format_detailed_menus(menus=menus_data)
+
+    return await count_queries(select_menus_detail)
 
 
 async def get_all_menus_data() -> list[dict[Any, Any]] | list[Any] | None:
@@ -44,7 +102,7 @@ async def get_all_menus_data() -> list[dict[Any, Any]] | list[Any] | None:
 
         menus_data_json = await menus_data[0].json()
 
-        return [menus_data_json]
+        return [to_response_json(menus_data_json)]
 
 
 async def get_menu_data_from_db_without_counters() -> dict[Any, Any]:
@@ -59,7 +117,7 @@ async def get_menu_data_from_db_without_counters() -> dict[Any, Any]:
         menus_data = await select_all_menus(session=session)
         menu_data_json = await menus_data[0].json()
 
-        return menu_data_json
+        return to_response_json(menu_data_json)
 
 
 async def get_menu_data_from_db_with_counters() -> dict[Any, Any] | None:
@@ -86,6 +144,6 @@ async def get_menu_data_from_db_with_counters() -> dict[Any, Any] | None:
 
             menu_json = await menu.json()
 
-            return menu_json
+            return to_response_json(menu_json)
 
     return None
@@ -2,7 +2,7 @@
 Модуль с операциями взаимодействия с БД, которые касаются тестов для подменю.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 31 января 2024
+Дата: 17 октября 2026 | Подсчет запросов выборки всех подменю
 """
 from typing import Any
 
@@ -13,7 +13,11 @@ from database.database_services import (
     select_all_submenus,
     select_specific_submenu,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from submenu.models import Submenu
+from submenu.submenu_services import prepare_submenus_to_response
+from tests_services.menu_services_for_tests import count_queries
+from tests_utils.utils import to_response_json
 
 
 async def get_submenus_data_from_db() -> list[dict[Any, Any]] | list[Any]:
@@ -41,7 +45,7 @@ async def get_submenus_data_from_db() -> list[dict[Any, Any]] | list[Any]:
 
             submenus_json['dishes'] = submenu_dishes
 
-            return [submenus_json]
+            return [to_response_json(submenus_json)]
         except IndexError:
             return []
 
@@ -84,3 +88,22 @@ async def get_specific_submenu_data_from_db() -> Submenu | dict[str, str]:
             return submenu
         except IndexError:
             return {'detail': 'submenu not found'}
+
+
+async def count_submenus_queries(target_menu_id: str) -> int:
+    """
+    Выполняет выборку и форматирование всех подменю меню так же, как GET /menus/{id}/submenus, и считает SQL запросы,
+    отправленные в БД
+
+    Args:
+        target_menu_id: идентификатор меню
+
+    Returns:
+        Количество запросов
+    """
+
+    async def select_submenus(session: AsyncSession) -> None:
+        submenus = await select_all_submenus(target_menu_id=target_menu_id, session=session)
+        await prepare_submenus_to_response(submenus=submenus)
+
+    return await count_queries(select_submenus)
@@ -3,7 +3,7 @@
 Тесты не отрабатывают из этого модуля, а эвэйтятся в основных тестовых модулях, поэтому назвал их внутренними.
 
 Автор: danisimore || Danil Vorobyev || danisimore@yandex.ru
-Дата: 30 января 2024 | Избавился от общих переменных.
+Дата: 17 октября 2026 | Тест условного GET запроса
 """
 
 from httpx import AsyncClient, Response
@@ -152,3 +152,41 @@ async def get_specific_object_when_table_is_empty_internal_test(
     )
 
     return response
+
+
+async def conditional_get_internal_test(ac: AsyncClient, url: str) -> None:
+    """
+    Тестирование условного GET запроса (If-None-Match) к эндпоинту, ответ которого кэшируется.
+
+    Тест проходит успешно, если:
+        1. Ответ содержит заголовок ETag.
+        2. На запрос с If-None-Match, равным ETag, и со слабым W/ETag сервер отвечает 304 без тела.
+        3. На запрос с другим If-None-Match сервер отвечает 200 с тем же ETag и тем же телом.
+
+    Args:
+        ac: клиент для асинхронных HTTP запросов,
+        url: эндпоинт, из которого нужно получить данные
+
+    Returns:
+        None
+    """
+
+    response = await ac.get(url=url)
+    etag = response.headers.get('etag')
+
+    assert response.status_code == 200
+    assert etag is not None
+
+    for if_none_match in (etag, 'W/' + etag, '"outdated", ' + etag):
+        not_modified_response = await ac.get(url=url, headers={'If-None-Match': if_none_match})
+
+        assert not_modified_response.status_code == 304
+        assert not_modified_response.content == b''
+        assert not_modified_response.headers.get('etag') == etag
+
+    for if_none_match in ('"outdated"', 'W/"outdated"'):
+        modified_response = await ac.get(url=url, headers={'If-None-Match': if_none_match})
+
+        assert modified_response.status_code == 200
+        assert modified_response.headers.get('etag') == etag
+        assert modified_response.json() == response.json()
@@ -5,7 +5,10 @@
 Дата: 29 января 2024
 """
 
+from typing import Any
+
 from httpx import Response
+from serialization import dumps, loads
 
 
 def get_created_object_attribute(response: Response, attribute: str) -> str:
@@ -24,3 +27,17 @@ def get_created_object_attribute(response: Response, attribute: str) -> str:
     created_object_attribute = create_object_response.json()[attribute]
 
     return created_object_attribute
+
+
+def to_response_json(value: Any) -> Any:
+    """
+    Функция приводит данные из БД к виду, в котором их отдает сервер: UUID и Decimal становятся строками.
+
+    Args:
+        value: данные, сформированные методами json() моделей
+
+    Returns:
+        Данные после сериализации и десериализации JSON
+    """
+
+    return loads(dumps(value))